@@ -1,3 +1,29 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DuplicateCandidate
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    """Review report of likely duplicate students, highest scores first."""
+    list_display = ('student_a', 'student_b', 'score', 'matched_fields', 'status', 'detected_at')
+    list_filter = ('status',)
+    list_select_related = ('student_a', 'student_b')
+    search_fields = ('student_a__roll_no', 'student_a__name', 'student_b__roll_no', 'student_b__name')
+    readonly_fields = ('student_a', 'student_b', 'score', 'reasons', 'detected_at')
+    actions = ('mark_confirmed', 'mark_dismissed')
+
+    @admin.display(description='Matched fields')
+    def matched_fields(self, candidate):
+        return ', '.join(candidate.reasons)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Mark as the same student')
+    def mark_confirmed(self, request, queryset):
+        queryset.update(status=DuplicateCandidate.CONFIRMED)
+
+    @admin.action(description='Mark as not duplicates')
+    def mark_dismissed(self, request, queryset):
+        queryset.update(status=DuplicateCandidate.DISMISSED)
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class StudentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'student'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .gazetteer import get_gazetteer
+        from .metrics import install_query_recorder
+
+        # Count queries per request for the instrumentation middleware.
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(sender=None, connection=connection)
+
+        # Load the gazetteer once at startup rather than on the first request.
+        get_gazetteer()
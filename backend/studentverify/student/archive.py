@@ -0,0 +1,191 @@
+import gzip
+import json
+import logging
+import os
+import re
+from itertools import groupby
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from .models import HistoryArchive, UpdateHistory
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLE = UpdateHistory._meta.db_table
+ARCHIVE_BATCH_SIZE = 5000
+
+_date_field = serializers.DateTimeField()
+
+
+def _entry(id_, student_id, changes, update_date):
+    # Same shape as UpdateHistorySerializer output
+    return {
+        'id': id_,
+        'student_id': student_id,
+        'changes': changes,
+        'update_date': _date_field.to_representation(update_date),
+    }
+
+
+def _compress(rows):
+    lines = ''.join(json.dumps(_entry(*row), ensure_ascii=False) + '\n' for row in rows)
+    return gzip.compress(lines.encode('utf-8'))
+
+
+def _decompress(data):
+    return [json.loads(line) for line in gzip.decompress(bytes(data)).decode('utf-8').splitlines()]
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [HISTORY_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(years):
+    """Create the yearly UpdateHistory partitions for ``years`` if missing.
+
+    A year whose rows already landed in the default partition cannot get
+    its own partition, it is skipped with a warning.
+    """
+    if not is_partitioned():
+        return []
+    created = []
+    for year in years:
+        name = '%s_y%d' % (HISTORY_TABLE, year)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SELECT to_regclass(%s)', [name])
+                if cursor.fetchone()[0] is not None:
+                    continue
+                cursor.execute(
+                    "CREATE TABLE %s PARTITION OF %s FOR VALUES FROM ('%d-01-01 00:00:00+00') "
+                    "TO ('%d-01-01 00:00:00+00')" % (name, HISTORY_TABLE, year, year + 1)
+                )
+        except DatabaseError as e:
+            logger.warning('Could not create history partition %s: %s', name, e)
+            continue
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions(cutoff):
+    """Drop yearly partitions that end on or before ``cutoff`` and are empty."""
+    if not is_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass', [HISTORY_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    dropped = []
+    prefix = '%s_y' % HISTORY_TABLE
+    for name in sorted(names):
+        if not name.startswith(prefix) or int(name[len(prefix):]) + 1 > cutoff.year:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM %s)' % name)
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute('ALTER TABLE %s DETACH PARTITION %s' % (HISTORY_TABLE, name))
+            cursor.execute('DROP TABLE %s' % name)
+        dropped.append(name)
+    return dropped
+
+
+def archive_history(cutoff, directory=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move change sets older than ``cutoff`` out of UpdateHistory.
+
+    Each batch is compressed into ``HistoryArchive`` rows, one per student,
+    or written to an NDJSON.gz file in ``directory``, and deleted from the
+    hot table in the same transaction. Returns the number of change sets
+    moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                UpdateHistory.objects.filter(update_date__lt=cutoff)
+                .order_by('student_id', 'update_date', 'id')
+                .values_list('id', 'student_id', 'changes', 'update_date')[:batch_size]
+            )
+            if not rows:
+                return moved
+            if directory is None:
+                archives = []
+                for student_id, group in groupby(rows, key=lambda row: row[1]):
+                    group = list(group)
+                    archives.append(HistoryArchive(
+                        student_id=student_id,
+                        first_date=group[0][3],
+                        last_date=group[-1][3],
+                        entries=len(group),
+                        data=_compress(group),
+                    ))
+                HistoryArchive.objects.bulk_create(archives)
+            else:
+                _write_archive_file(directory, rows)
+            # update_date bound lets PostgreSQL prune to the old partitions
+            UpdateHistory.objects.filter(
+                id__in=[row[0] for row in rows], update_date__lt=cutoff
+            ).delete()
+        moved += len(rows)
+
+
+# Rows are sorted by student, the name carries the range of student ids so
+# a lookup only opens the files that can hold the student.
+ARCHIVE_FILE_NAME = re.compile(r'^history-[^-]+-\d+(?:-s(\d+)-(\d+))?\.ndjson\.gz$')
+
+
+def _write_archive_file(directory, rows):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'history-%s-%d-s%d-%d.ndjson.gz' % (
+        timezone.now().strftime('%Y%m%dT%H%M%S%f'), rows[0][0], rows[0][1], rows[-1][1]
+    ))
+    with open(path, 'wb') as f:
+        f.write(_compress(rows))
+    return path
+
+
+def _archive_file_entries(directory, student_id):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    entries = []
+    for name in names:
+        match = ARCHIVE_FILE_NAME.match(name)
+        if match is None:
+            continue
+        if match.group(1) is not None and not int(match.group(1)) <= student_id <= int(match.group(2)):
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            entries.extend(entry for entry in _decompress(f.read()) if entry['student_id'] == student_id)
+    return entries
+
+
+def archived_history(student_id, directory=None):
+    """Archived change sets of a student, newest first.
+
+    Reads the ``HistoryArchive`` table and the NDJSON.gz files in
+    ``directory``, ``HISTORY_ARCHIVE_DIR`` by default. Files written to any
+    other ``--directory`` are offline archives and not read.
+    """
+    entries = []
+    for data in HistoryArchive.objects.filter(student_id=student_id).values_list('data', flat=True):
+        entries.extend(_decompress(data))
+    directory = directory or settings.HISTORY_ARCHIVE_DIR
+    if directory:
+        entries.extend(_archive_file_entries(directory, student_id))
+    entries.sort(key=lambda entry: (parse_datetime(entry['update_date']), entry['id']), reverse=True)
+    return entries
@@ -0,0 +1,128 @@
+"""Async read path for the endpoints hit hardest on result day.
+
+These mirror ``login_view``, ``StudentViewSet.retrieve`` and the ``history``
+action with identical payloads, using Django's async ORM and cache APIs.
+Served through ``studentverify.asgi`` they keep a worker free while waiting
+on PostgreSQL instead of blocking one per request.
+"""
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+
+from .authentication import issue_token
+from .cache import aget_student_entry, invalidate_student
+from .conditional import conditional_read_response, set_validators
+from .events import EventPosition, event_stream
+from .hashers import check_student_password, hash_student_password
+from .models import Student
+from .throttling import athrottle_wait
+from .views import history_page
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+@csrf_exempt
+@require_POST
+async def login_view(request):
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return _error('Invalid JSON', 400)
+    if not isinstance(body, dict):
+        return _error('Expected a JSON object', 400)
+    roll_no = body.get('roll_no')
+    password = body.get('password')
+
+    wait = await athrottle_wait('login', BaseThrottle().get_ident(request), roll_no)
+    if wait is not None:
+        seconds = math.ceil(wait)
+        response = _error('Request was throttled. Expected available in %d seconds.' % seconds, 429)
+        response['Retry-After'] = str(seconds)
+        return response
+
+    loaded = []
+
+    async def load():
+        loaded.append(await Student.objects.aget(roll_no=roll_no))
+        return loaded[0]
+
+    try:
+        entry = await aget_student_entry(roll_no, load)
+    except Student.DoesNotExist:
+        return _error('Student not found', 404)
+    # The hash is never cached, read from the row just loaded or on its own
+    if loaded:
+        encoded = loaded[0].password
+    else:
+        encoded = await Student.objects.filter(roll_no=roll_no).values_list('password', flat=True).afirst()
+    if encoded is None:
+        return _error('Student not found', 404)
+
+    def upgrade_hash(raw_password):
+        Student.objects.filter(roll_no=roll_no).update(password=hash_student_password(raw_password))
+        invalidate_student(roll_no)
+
+    # Hashing is CPU bound, keep it off the event loop.
+    valid = await sync_to_async(check_student_password, thread_sensitive=False)(
+        password, encoded, upgrade_hash
+    )
+    if not valid:
+        return _error('Invalid credentials', 401)
+
+    data = dict(entry['data'], token=issue_token(entry['data']['roll_no']))
+    return set_validators(JsonResponse(data), entry['etag'], entry['last_modified'])
+
+
+@require_GET
+async def student_detail(request, roll_no):
+    try:
+        entry = await aget_student_entry(roll_no, lambda: Student.objects.aget(roll_no=roll_no))
+    except Student.DoesNotExist:
+        return _error('No Student matches the given query.', 404)
+
+    response = conditional_read_response(request, entry['etag'], entry['last_modified'])
+    if response is None:
+        response = set_validators(JsonResponse(entry['data']), entry['etag'], entry['last_modified'])
+    return response
+
+
+@require_GET
+async def student_history(request, roll_no):
+    try:
+        student = await Student.objects.only('id').aget(roll_no=roll_no)
+    except Student.DoesNotExist:
+        return _error('No Student matches the given query.', 404)
+
+    # DRF's cursor paginator is synchronous, the page query runs in a thread.
+    try:
+        data = await sync_to_async(history_page)(Request(request), student.id)
+    except ValueError as e:
+        return _error(str(e), 400)
+    return JsonResponse(data)
+
+
+@require_GET
+async def student_events(request):
+    # Server-sent change events for live dashboards, instead of polling the
+    # student list. Browsers resume with the Last-Event-ID header, other
+    # clients can pass ?last_event_id=.
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    position = None
+    if value:
+        try:
+            position = EventPosition.parse(value)
+        except ValueError:
+            return _error('Last-Event-ID must be an event id.', 400)
+    response = StreamingHttpResponse(event_stream(position), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keeps nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
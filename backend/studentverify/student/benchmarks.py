@@ -0,0 +1,420 @@
+import json
+import random
+import string
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import product
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import issue_token
+from .gazetteer import get_gazetteer
+from .hashers import hash_student_password
+from .importers import copy_rows
+from .loadtest import percentile
+from .metrics import registry
+from .models import DuplicateCandidate, DuplicateKey, HistoryArchive, OTPVerification, Student, UpdateHistory
+from .otp import build_otp
+from .stats import rebuild_statistics
+
+# Synthetic roll numbers start with a letter so they never collide with the
+# numeric roll numbers of real students. Mixed case gives 52 * 62 * 62
+# codes within the three character column.
+ROLL_NO_ALPHABET = string.digits + string.ascii_letters
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_roll_nos(count):
+    existing = set(Student.objects.values_list('roll_no', flat=True))
+    codes = (
+        first + ''.join(rest)
+        for first in string.ascii_letters
+        for rest in product(ROLL_NO_ALPHABET, repeat=2)
+    )
+    roll_nos = []
+    for code in codes:
+        if code not in existing:
+            roll_nos.append(code)
+            if len(roll_nos) == count:
+                return roll_nos
+    raise ValueError('Not enough free synthetic roll numbers for %d students' % count)
+
+
+BENCHMARK_PASSWORD = '123456'
+BENCHMARK_OTP = '654321'
+
+
+def seed_students(roll_nos, **overrides):
+    # Hashed once and shared, seeding should not pay the login cost per row.
+    password = hash_student_password(BENCHMARK_PASSWORD)
+    Student.objects.bulk_create([
+        Student(
+            roll_no=roll_no,
+            password=password,
+            name='Benchmark %s' % roll_no,
+            date_of_birth=date(2005, 1, 1),
+            mobile_number='9000000000',
+            father_mobile_number='9000000001',
+            field_of_study='Benchmark',
+            address='Benchmark address',
+            district='Benchmark',
+            **overrides
+        )
+        for roll_no in roll_nos
+    ], batch_size=1000)
+
+
+def seed_otps(roll_nos):
+    """Give each student a live ``BENCHMARK_OTP``, as ``send_otp`` would
+    without the SMS and its rate limit."""
+    OTPVerification.objects.bulk_create([
+        build_otp(student_id, mobile_number, BENCHMARK_OTP)
+        for student_id, mobile_number in Student.objects.filter(roll_no__in=roll_nos).values_list('id', 'mobile_number')
+    ], batch_size=1000)
+
+
+def api_client(**kwargs):
+    return APIClient(SERVER_NAME='localhost', **kwargs)
+
+
+def measure(func):
+    """Run ``func`` and return ``(seconds, query_count)``."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    return elapsed, len(queries)
+
+
+def run_rolled_back(func):
+    """Run ``func`` in a transaction that is always rolled back."""
+    result = None
+    try:
+        with transaction.atomic():
+            result = func()
+            raise Rollback()
+    except Rollback:
+        pass
+    return result
+
+
+def bench_bulk_verify(count):
+    """Compare ``count`` single ``verify_otp`` calls with one ``bulk_verify`` call."""
+    def scenario():
+        client = api_client()
+        roll_nos = synthetic_roll_nos(count * 2)
+        single, bulk = roll_nos[:count], roll_nos[count:]
+        seed_students(roll_nos)
+        seed_otps(single)
+
+        def single_calls():
+            # Measures the verification, not the per IP limit of the OTP scope
+            with override_settings(THROTTLE_RATES=dict(settings.THROTTLE_RATES, otp={})):
+                for roll_no in single:
+                    client.post('/api/students/%s/verify_otp/' % roll_no, {'otp': BENCHMARK_OTP}, format='json')
+
+        office = get_user_model().objects.create_user('benchmark-office', is_staff=True)
+
+        def bulk_call():
+            # Bulk verification is a staff endpoint
+            client.force_authenticate(office)
+            client.post('/api/students/bulk_verify/', {'roll_nos': bulk}, format='json')
+
+        return [
+            ('%d x verify_otp' % count, count) + measure(single_calls),
+            ('1 x bulk_verify (%d)' % count, 1) + measure(bulk_call),
+        ]
+    return run_rolled_back(scenario)
+
+
+def bench_login(count):
+    """Sequential logins (one core) followed by token-authenticated profile reads.
+
+    Each login pays one password hash, the profile reads present the signed
+    token instead.
+    """
+    def scenario():
+        client = api_client()
+        roll_nos = synthetic_roll_nos(min(count, 100))
+        seed_students(roll_nos)
+
+        def logins():
+            for i in range(count):
+                client.post(
+                    '/api/login/',
+                    {'roll_no': roll_nos[i % len(roll_nos)], 'password': BENCHMARK_PASSWORD},
+                    format='json'
+                )
+
+        tokens = [issue_token(roll_no) for roll_no in roll_nos]
+
+        def profile_reads():
+            for i in range(count):
+                roll_no = roll_nos[i % len(roll_nos)]
+                client.get(
+                    '/api/students/%s/' % roll_no,
+                    HTTP_AUTHORIZATION='Token %s' % tokens[i % len(tokens)]
+                )
+
+        return [
+            ('%d x login' % count, count) + measure(logins),
+            ('%d x token profile read' % count, count) + measure(profile_reads),
+        ]
+    return run_rolled_back(scenario)
+
+
+SCENARIOS = {
+    'bulk-verify': bench_bulk_verify,
+    'login': bench_login,
+}
+
+
+# Synthetic cohort, persistent and recognisable by its e-mail domain
+
+COHORT_EMAIL_DOMAIN = 'cohort.invalid'
+COHORT_BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Hetvi', 'Jay', 'Kavya', 'Krish', 'Meera', 'Nirav', 'Pooja', 'Rohan',
+               'Sneha', 'Tanvi', 'Vivaan', 'Yash', 'Zeel']
+LAST_NAMES = ['Bhatt', 'Chauhan', 'Desai', 'Joshi', 'Mehta', 'Modi', 'Panchal', 'Parmar', 'Patel',
+              'Rathod', 'Shah', 'Solanki', 'Trivedi', 'Vyas']
+FIELDS_OF_STUDY = ['Computer Science', 'Commerce', 'Mechanical', 'Civil', 'Electrical', 'Pharmacy', 'Arts']
+HISTORY_FIELDS = ['address', 'city', 'email', 'mobile_number', 'name', 'pincode']
+
+
+def cohort_students():
+    return Student.objects.filter(email__endswith='@' + COHORT_EMAIL_DOMAIN)
+
+
+def _mobile(rng):
+    return '9%09d' % rng.randrange(10 ** 9)
+
+
+def _history_values(rng, field, gazetteer_names):
+    if field == 'city':
+        return rng.choice(gazetteer_names['city']), rng.choice(gazetteer_names['city'])
+    if field == 'mobile_number':
+        return _mobile(rng), _mobile(rng)
+    if field == 'pincode':
+        return rng.choice(gazetteer_names['pincode']), rng.choice(gazetteer_names['pincode'])
+    if field == 'name':
+        return ('%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+                '%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)))
+    if field == 'email':
+        return 'old%d@example.com' % rng.randrange(10 ** 6), 'new%d@example.com' % rng.randrange(10 ** 6)
+    return ('%d, Old Society, Near Bus Stand' % rng.randrange(1, 500),
+            '%d, New Society, Station Road' % rng.randrange(1, 500))
+
+
+def _insert_history(rows):
+    columns = ['student_id', 'changes', 'update_date']
+    table = UpdateHistory._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            copy_rows(cursor, table, columns, rows)
+        else:
+            # update_date is auto_now_add, bulk_create would overwrite it
+            cursor.executemany(
+                'INSERT INTO %s (%s) VALUES (%%s, %%s, %%s)' % (table, ', '.join(columns)), rows
+            )
+
+
+def seed_cohort(students, history_per_student, seed=0, progress=None):
+    """Bulk insert ``students`` synthetic students with on average
+    ``history_per_student`` change sets each, spread over two years.
+
+    Addresses come from the gazetteer so seeded rows pass validation.
+    Returns ``(students, change_sets)`` created.
+    """
+    rng = random.Random(seed)
+    gazetteer = get_gazetteer()
+    names = {kind: gazetteer.indexes[kind].names for kind in ('district', 'taluka', 'city', 'pincode')}
+    password = hash_student_password(BENCHMARK_PASSWORD)
+    now = timezone.now()
+    roll_nos = synthetic_roll_nos(students)
+    change_sets = 0
+
+    for start in range(0, len(roll_nos), COHORT_BATCH_SIZE):
+        batch = roll_nos[start:start + COHORT_BATCH_SIZE]
+        with transaction.atomic():
+            created = Student.objects.bulk_create([
+                Student(
+                    roll_no=roll_no,
+                    password=password,
+                    name='%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+                    date_of_birth=date(2003, 1, 1) + timedelta(days=rng.randrange(1500)),
+                    mobile_number=_mobile(rng),
+                    # Unique even compared case-insensitively, roll numbers are not
+                    email='%d.%s@%s' % (start + i, roll_no, COHORT_EMAIL_DOMAIN),
+                    father_mobile_number=_mobile(rng),
+                    field_of_study=rng.choice(FIELDS_OF_STUDY),
+                    address='%d, %s Society, Main Road' % (rng.randrange(1, 500), rng.choice(LAST_NAMES)),
+                    taluka=rng.choice(names['taluka']),
+                    city=rng.choice(names['city']),
+                    district=rng.choice(names['district']),
+                    pincode=rng.choice(names['pincode']),
+                    is_data_verified=rng.random() < 0.6,
+                    is_mobile_verified=rng.random() < 0.75,
+                )
+                for i, roll_no in enumerate(batch)
+            ])
+            history = []
+            for student in created:
+                for _ in range(rng.randint(0, 2 * history_per_student)):
+                    fields = rng.sample(HISTORY_FIELDS, rng.randint(1, 3))
+                    changes = {field: list(_history_values(rng, field, names)) for field in fields}
+                    history.append((
+                        student.id,
+                        json.dumps(changes),
+                        now - timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600)),
+                    ))
+            _insert_history(history)
+            change_sets += len(history)
+        if progress:
+            progress(start + len(batch), change_sets)
+
+    rebuild_statistics()
+    return len(roll_nos), change_sets
+
+
+def clear_cohort():
+    """Delete the synthetic cohort and everything referencing it."""
+    ids = cohort_students().values('id')
+    for model in (UpdateHistory, HistoryArchive, OTPVerification, DuplicateKey):
+        model.objects.filter(student_id__in=ids).delete()
+    # Pairs with a student outside the cohort go too
+    DuplicateCandidate.objects.filter(Q(student_a_id__in=ids) | Q(student_b_id__in=ids)).delete()
+    # A raw DELETE, the per-row signals of Model.delete() would dominate
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM %s WHERE email LIKE %%s' % Student._meta.db_table, ['%@' + COHORT_EMAIL_DOMAIN]
+        )
+        deleted = cursor.rowcount
+    rebuild_statistics()
+    return deleted
+
+
+# The login -> retrieve -> PATCH -> verify_otp -> history flow of the React app
+
+FLOW_STEPS = {
+    # step: (route, method) as recorded by the instrumentation middleware
+    'login': ('login', 'POST'),
+    'retrieve': ('student-detail', 'GET'),
+    'patch': ('student-detail', 'PATCH'),
+    'verify_otp': ('student-verify-otp', 'POST'),
+    'history': ('student-history', 'GET'),
+}
+
+
+def run_flow(roll_nos, users, iterations):
+    """Run the app flow ``iterations`` times per virtual user, ``users``
+    threads at a time, each thread on its own connection.
+
+    Returns ``{'seconds', 'requests', 'throughput', 'steps': {step: {...}}}``
+    with p50/p95/p99 latency, error count and queries per request per step.
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def timed(step, call):
+        started = time.perf_counter()
+        try:
+            response = call()
+        except Exception:
+            response = None
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies[step].append(elapsed)
+            if response is None or response.status_code >= 400:
+                errors[step] += 1
+        return response
+
+    def user(index):
+        client = api_client(raise_request_exception=False)
+        for i in range(iterations):
+            roll_no = roll_nos[(index + i * users) % len(roll_nos)]
+            url = '/api/students/%s/' % roll_no
+            client.credentials()
+            response = timed('login', lambda: client.post(
+                '/api/login/', {'roll_no': roll_no, 'password': BENCHMARK_PASSWORD}, format='json'
+            ))
+            if response is not None and response.status_code == 200:
+                client.credentials(HTTP_AUTHORIZATION='Token %s' % response.data['token'])
+            response = timed('retrieve', lambda: client.get(url))
+            etag = response.get('ETag', '') if response is not None else ''
+            timed('patch', lambda: client.patch(
+                url, {'address': '%d, Flow Society, Station Road' % i}, format='json', HTTP_IF_MATCH=etag
+            ))
+            seed_otps([roll_no])
+            timed('verify_otp', lambda: client.post(url + 'verify_otp/', {'otp': BENCHMARK_OTP}, format='json'))
+            timed('history', lambda: client.get(url + 'history/'))
+
+    def threaded_user(index):
+        try:
+            user(index)
+        finally:
+            connection.close()
+
+    registry.reset()
+    started = time.perf_counter()
+    if users == 1:
+        user(0)
+    else:
+        with ThreadPoolExecutor(users) as executor:
+            list(executor.map(threaded_user, range(users)))
+    seconds = time.perf_counter() - started
+
+    steps = {}
+    for step, key in FLOW_STEPS.items():
+        values = sorted(latencies[step])
+        queries = registry.queries.get(key)
+        steps[step] = {
+            'requests': len(values),
+            'errors': errors[step],
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'queries': queries.sum / queries.count if queries and queries.count else 0.0,
+        }
+    requests = sum(step['requests'] for step in steps.values())
+    return {
+        'seconds': seconds,
+        'requests': requests,
+        'throughput': requests / seconds if seconds else 0.0,
+        'steps': steps,
+    }
+
+
+def compare_with_baseline(baseline, result, tolerance):
+    """Regressions of ``result`` against ``baseline`` as readable strings.
+
+    p95 latency and throughput may move by ``tolerance`` (a fraction),
+    queries per request may not grow at all.
+    """
+    regressions = []
+    if result['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append('throughput %.1f req/s, baseline %.1f' % (result['throughput'], baseline['throughput']))
+    for step, current in result['steps'].items():
+        previous = baseline['steps'].get(step)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append('%s p95 %.1f ms, baseline %.1f' % (step, current['p95_ms'], previous['p95_ms']))
+        if current['queries'] > previous['queries'] + 1e-9:
+            regressions.append('%s queries/request %.2f, baseline %.2f' % (
+                step, current['queries'], previous['queries']
+            ))
+    return regressions
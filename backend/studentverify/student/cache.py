@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .conditional import student_etag, student_last_modified
+from .serializers import StudentSerializer, values_serializer
+
+
+def _cache():
+    return caches[getattr(settings, 'STUDENT_CACHE_ALIAS', 'default')]
+
+
+def student_cache_key(roll_no):
+    return 'student:profile:%s' % roll_no
+
+
+def build_student_entry(student):
+    # The password hash is left out, the cache may be shared or on disk
+    return {
+        'data': values_serializer(StudentSerializer).represent_instance(student),
+        'etag': student_etag(student.updated_at),
+        'last_modified': student_last_modified(student.updated_at),
+    }
+
+
+def get_student_entry(roll_no, loader):
+    """Return the cached profile entry for ``roll_no``.
+
+    On a miss ``loader()`` is called to fetch the ``Student``, any exception
+    it raises (``DoesNotExist``, ``Http404``) propagates and nothing is cached.
+    """
+    cache = _cache()
+    key = student_cache_key(roll_no)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_student_entry(loader())
+        cache.set(key, entry, getattr(settings, 'STUDENT_CACHE_TIMEOUT', 300))
+    return entry
+
+
+def invalidate_students(roll_nos):
+    keys = [student_cache_key(roll_no) for roll_no in roll_nos]
+    if not keys:
+        return
+    cache = _cache()
+    cache.delete_many(keys)
+    # A concurrent read may have re-populated the key with pre-commit data.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_student(roll_no):
+    invalidate_students([roll_no])
+
+
+async def aget_student_entry(roll_no, loader):
+    """Async variant of ``get_student_entry``, ``loader`` is a coroutine function."""
+    cache = _cache()
+    key = student_cache_key(roll_no)
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = build_student_entry(await loader())
+        await cache.aset(key, entry, getattr(settings, 'STUDENT_CACHE_TIMEOUT', 300))
+    return entry
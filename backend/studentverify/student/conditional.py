@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response, parse_etags
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The student was modified by another request, reload and try again.'
+    default_code = 'precondition_failed'
+
+
+class PreconditionRequired(APIException):
+    status_code = status.HTTP_428_PRECONDITION_REQUIRED
+    default_detail = 'An If-Match header is required to update a student.'
+    default_code = 'precondition_required'
+
+
+def student_etag(updated_at):
+    return '"%x"' % int(updated_at.timestamp() * 1000000)
+
+
+def student_last_modified(updated_at):
+    return int(updated_at.timestamp())
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_read_response(request, etag, last_modified):
+    """Return a 304/412 response if the request's validators allow it, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def check_if_match(request, updated_at):
+    """Reject writes whose If-Match does not name the current version.
+
+    Raises ``PreconditionRequired`` when the header is missing and
+    ``STUDENT_REQUIRE_IF_MATCH`` is enabled, ``PreconditionFailed`` when it
+    is stale.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header:
+        if getattr(settings, 'STUDENT_REQUIRE_IF_MATCH', True):
+            raise PreconditionRequired()
+        return
+    etags = parse_etags(header)
+    # If-Match uses the strong comparison, weak validators never match.
+    if '*' not in etags and student_etag(updated_at) not in etags:
+        raise PreconditionFailed()
@@ -0,0 +1,301 @@
+"""Fuzzy detection of students entered more than once.
+
+Every student gets blocking keys: each normalized mobile number, a
+phonetic key of the name together with the date of birth, and the e-mail
+address. Only students sharing a key are compared, so the work grows with
+the block sizes instead of the square of the table. Pairs scoring at least
+``DUPLICATE_THRESHOLD`` are kept as ``DuplicateCandidate`` rows for review
+in the admin.
+
+``detect_duplicates()`` rebuilds everything, ``refresh_duplicates()``
+re-indexes and re-scores just the given students after a write.
+"""
+import logging
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import DuplicateCandidate, DuplicateKey, Student
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_FIELDS = ('name', 'date_of_birth', 'mobile_number', 'father_mobile_number', 'email')
+
+# Share of the score per field, fields missing on either side are left out
+WEIGHTS = {
+    'name': 0.35,
+    'date_of_birth': 0.2,
+    'mobile_number': 0.2,
+    'father_mobile_number': 0.15,
+    'email': 0.1,
+}
+# Field similarity counted as a match in the candidate's reasons
+MATCH_SIMILARITY = 0.8
+
+# Transliteration variants of Gujarati and Hindi names written in Latin
+# script, applied in order before vowels are dropped.
+PHONETIC_RULES = (
+    ('ph', 'f'), ('bh', 'b'), ('dh', 'd'), ('gh', 'g'), ('jh', 'j'), ('kh', 'k'),
+    ('sh', 's'), ('th', 't'), ('ck', 'k'), ('q', 'k'), ('c', 'k'), ('z', 'j'),
+    ('w', 'v'), ('x', 'ks'),
+)
+
+QUERY_CHUNK_SIZE = 500
+
+
+def normalize_mobile(value):
+    """Digits of a mobile number without country code or trunk prefix."""
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-10:]
+
+
+def normalize_name(value):
+    """Casefolded name tokens in sorted order, so that "Patel Rohan" and
+    "rohan  patel" compare equal."""
+    return ' '.join(sorted(re.sub(r'[\W\d_]+', ' ', (value or '').casefold()).split()))
+
+
+def _phonetic_token(token):
+    if not token.isascii():
+        return token
+    for old, new in PHONETIC_RULES:
+        token = token.replace(old, new)
+    # First letter kept, later vowels and soft letters dropped, doubles collapsed
+    key = token[0] + re.sub(r'[aeiouyh]', '', token[1:])
+    return re.sub(r'(.)\1+', r'\1', key)
+
+
+def phonetic_key(name):
+    """Spelling-insensitive key of a name: "Bhavin Patel", "Bhaveen Patil"
+    and "patel bhavin" all give ``bvn ptl``."""
+    return ' '.join(sorted(_phonetic_token(token) for token in normalize_name(name).split()))
+
+
+def blocking_keys(row):
+    """Index keys of a student given as a dict of ``IDENTITY_FIELDS``, raw
+    or ``comparable()``."""
+    keys = set()
+    # One namespace for both numbers, a student's own number entered as the
+    # father's still lands in the same block.
+    for field in ('mobile_number', 'father_mobile_number'):
+        mobile = normalize_mobile(row[field])
+        if len(mobile) == 10:
+            keys.add('m:%s' % mobile)
+    name = phonetic_key(row['name'])
+    if name and row['date_of_birth']:
+        keys.add(('n:%s:%s' % (row['date_of_birth'].isoformat(), name))[:120])
+    if row['email']:
+        keys.add(('e:%s' % row['email'].strip().casefold())[:120])
+    return keys
+
+
+def _one_typo(a, b):
+    # Same length and one substituted or two swapped adjacent characters
+    if len(a) != len(b) or a == b:
+        return False
+    diffs = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+    if len(diffs) == 1:
+        return True
+    return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+
+
+def comparable(row):
+    """The identity fields of ``row`` normalized once, for ``score_pair``."""
+    return {
+        'name': normalize_name(row['name']),
+        'date_of_birth': row['date_of_birth'],
+        'mobile_number': normalize_mobile(row['mobile_number']),
+        'father_mobile_number': normalize_mobile(row['father_mobile_number']),
+        'email': (row['email'] or '').strip().casefold(),
+    }
+
+
+def field_similarity(field, a, b):
+    """0..1 similarity of two normalized values of ``field``, ``None`` if
+    either is empty."""
+    if not a or not b:
+        return None
+    if a == b:
+        return 1.0
+    if field == 'name':
+        return SequenceMatcher(None, a, b).ratio()
+    if field == 'date_of_birth':
+        swapped = a.year == b.year and a.day == b.month and a.month == b.day
+        return 0.5 if swapped or _one_typo(a.isoformat(), b.isoformat()) else 0.0
+    if field == 'email':
+        return 0.0
+    return 0.8 if _one_typo(a, b) else 0.0
+
+
+def score_pair(a, b, threshold=0.0):
+    """``(score, matched fields)`` of two students given as ``comparable()``
+    dicts, ``None`` when the score cannot reach ``threshold``."""
+    total = weight = 0.0
+    reasons = []
+    # The name comparison is the costly one, it only runs when the other
+    # fields leave the threshold within reach.
+    for field in ('date_of_birth', 'mobile_number', 'father_mobile_number', 'email', 'name'):
+        field_weight = WEIGHTS[field]
+        if field == 'name' and a[field] and b[field] and total + field_weight < threshold * (weight + field_weight):
+            return None
+        similarity = field_similarity(field, a[field], b[field])
+        if similarity is None:
+            continue
+        total += similarity * field_weight
+        weight += field_weight
+        if similarity >= MATCH_SIMILARITY:
+            reasons.append(field)
+    if not weight or total < threshold * weight:
+        return None
+    reasons.sort(key=list(WEIGHTS).index)
+    return round(total / weight, 4), reasons
+
+
+def _settings():
+    return (
+        getattr(settings, 'DUPLICATE_THRESHOLD', 0.75),
+        getattr(settings, 'DUPLICATE_MAX_BLOCK', 50),
+    )
+
+
+def _score_blocks(blocks, rows, only=None):
+    """Score the pairs sharing a block, ``{(id_a, id_b): (score, reasons)}``
+    for those over the threshold. With ``only`` just pairs involving one of
+    those ids are scored."""
+    threshold, max_block = _settings()
+    pairs = {}
+    seen = set()
+    for key, ids in blocks.items():
+        ids = sorted(set(ids))
+        if len(ids) > max_block:
+            # A shared placeholder such as 0000000000, says nothing about identity
+            logger.info('Skipping duplicate block %s of %d students', key, len(ids))
+            continue
+        if only is None:
+            candidates = combinations(ids, 2)
+        else:
+            candidates = {tuple(sorted((i, j))) for i in ids if i in only for j in ids if j != i}
+        for pair in candidates:
+            if pair in seen:
+                continue
+            seen.add(pair)
+            result = score_pair(rows[pair[0]], rows[pair[1]], threshold)
+            if result is not None:
+                pairs[pair] = result
+    return pairs
+
+
+def _store_candidates(pairs, existing):
+    """Make the candidate rows in ``existing`` match ``pairs``, keeping the
+    review status of pairs found again."""
+    current = {(c.student_a_id, c.student_b_id): c for c in existing}
+    stale = [c.id for pair, c in current.items() if pair not in pairs]
+    for chunk in _chunks(stale):
+        DuplicateCandidate.objects.filter(id__in=chunk).delete()
+    updated = []
+    created = []
+    for (a, b), (score, reasons) in pairs.items():
+        candidate = current.get((a, b))
+        if candidate is None:
+            created.append(DuplicateCandidate(student_a_id=a, student_b_id=b, score=score, reasons=reasons))
+        elif candidate.score != score or candidate.reasons != reasons:
+            candidate.score, candidate.reasons = score, reasons
+            updated.append(candidate)
+    DuplicateCandidate.objects.bulk_update(updated, ['score', 'reasons'], batch_size=QUERY_CHUNK_SIZE)
+    DuplicateCandidate.objects.bulk_create(created, batch_size=QUERY_CHUNK_SIZE)
+    return len(created)
+
+
+def _chunks(values, size=QUERY_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _identity_rows(queryset):
+    return {
+        row['id']: comparable(row)
+        for row in queryset.values('id', *IDENTITY_FIELDS).iterator(chunk_size=5000)
+    }
+
+
+def _insert_keys(rows):
+    # Hundreds of thousands of rows on a rebuild, model instances would
+    # cost more than the scoring.
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO %s (%s, %s) VALUES (%%s, %%s)' % (
+                qn(DuplicateKey._meta.db_table), qn('student_id'), qn('key')
+            ),
+            rows,
+        )
+
+
+def detect_duplicates():
+    """Rebuild the blocking index and all candidates from the student table.
+
+    Returns ``{(id_a, id_b): (score, reasons)}`` of the pairs found.
+    """
+    rows = _identity_rows(Student.objects.all())
+    blocks = defaultdict(list)
+    keys = []
+    for student_id, row in rows.items():
+        for key in blocking_keys(row):
+            blocks[key].append(student_id)
+            keys.append((student_id, key))
+    pairs = _score_blocks(blocks, rows)
+
+    with transaction.atomic():
+        DuplicateKey.objects.all().delete()
+        _insert_keys(keys)
+        _store_candidates(pairs, DuplicateCandidate.objects.all())
+    return pairs
+
+
+def refresh_duplicates(student_ids):
+    """Re-index the given students and re-score the pairs they are part of.
+
+    Cost grows with the number of students and the size of their blocks,
+    meant to run after every import batch and profile update.
+    """
+    ids = set(student_ids)
+    if not ids:
+        return {}
+    with transaction.atomic():
+        rows = {}
+        for chunk in _chunks(ids):
+            rows.update(_identity_rows(Student.objects.filter(id__in=chunk)))
+        keys = {student_id: blocking_keys(row) for student_id, row in rows.items()}
+        for chunk in _chunks(ids):
+            DuplicateKey.objects.filter(student_id__in=chunk).delete()
+        _insert_keys([(student_id, key) for student_id, ks in keys.items() for key in ks])
+
+        blocks = defaultdict(list)
+        for chunk in _chunks(set().union(*keys.values())):
+            for key, student_id in DuplicateKey.objects.filter(key__in=chunk).values_list('key', 'student_id'):
+                blocks[key].append(student_id)
+        others = {student_id for members in blocks.values() for student_id in members} - rows.keys()
+        for chunk in _chunks(others):
+            rows.update(_identity_rows(Student.objects.filter(id__in=chunk)))
+        pairs = _score_blocks(blocks, rows, only=ids)
+
+        existing = []
+        for chunk in _chunks(ids):
+            existing.extend(DuplicateCandidate.objects.filter(Q(student_a__in=chunk) | Q(student_b__in=chunk)))
+        # A pair of two refreshed students comes up in both chunks
+        _store_candidates(pairs, {c.id: c for c in existing}.values())
+    return pairs
+
+
+def refresh_duplicates_on_commit(student_ids):
+    """Schedule ``refresh_duplicates`` for after the current transaction, a
+    failure is logged and does not affect the write that triggered it."""
+    ids = list(student_ids)
+    if ids:
+        transaction.on_commit(lambda: refresh_duplicates(ids), robust=True)
@@ -0,0 +1,330 @@
+"""Student change events, streamed to live dashboards as server-sent events.
+
+Every event is an ``UpdateHistory`` change set: the event id is the history
+id, the data the roll number, the changed fields and the student's
+verification flags. Writers call ``publish_history()`` in the transaction
+that saves the change sets, the events go out once it commits.
+
+Events reach the open streams through the broadcaster named by
+``EVENTS_BROADCASTER``. ``LocalBroadcaster``, the default, fans out the
+events published in its own process. Behind several workers use
+``HistoryPollingBroadcaster``, which reads new change sets from the table
+once per ``EVENTS_POLL_INTERVAL`` for all streams of the process.
+
+A client reconnecting with ``Last-Event-ID`` is sent the change sets it
+missed from ``UpdateHistory`` before live events, so the stream can be
+resumed after a dropped connection, a restart or a slow client being cut
+off.
+
+History ids are handed out at insert but a change set only shows up once
+its transaction commits, so ids do not arrive in order. Streams and
+pollers track an ``EventPosition``: the highest id seen and the ids below
+it, within ``EVENTS_LOOKBACK``, not seen yet, which are read again until
+they commit or fall out of the window. The SSE event id is that position,
+``<id>`` or ``<id>:<missing>,<missing>...``, so a resumed stream picks up
+late commits too.
+"""
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Max, Q
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import UpdateHistory
+
+logger = logging.getLogger(__name__)
+
+FLAG_FIELDS = ('is_data_verified', 'is_mobile_verified')
+
+
+def history_event(history_id, roll_no, changes, flags):
+    """The event of a change set. ``flags`` are the student's current flag
+    values, those the change set wrote take precedence."""
+    flags = dict(flags)
+    for field in FLAG_FIELDS:
+        if field in changes:
+            # Change sets store values as text
+            flags[field] = changes[field][1] == 'True'
+    return {'id': history_id, 'roll_no': roll_no, 'fields': sorted(changes), 'flags': flags}
+
+
+def events_after(last_id, limit, missing=()):
+    """Events of the change sets after ``last_id`` or among the ``missing``
+    ids below it, oldest first."""
+    rows = (
+        UpdateHistory.objects.filter(Q(id__gt=last_id) | Q(id__in=missing)).order_by('id')
+        .values_list('id', 'changes', 'student__roll_no', *('student__%s' % field for field in FLAG_FIELDS))
+    )[:limit]
+    return [
+        history_event(history_id, roll_no, changes, dict(zip(FLAG_FIELDS, flags)))
+        for history_id, changes, roll_no, *flags in rows
+    ]
+
+
+def last_event_id():
+    return UpdateHistory.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+class EventPosition:
+    """Where a stream is in the change sets: ``last_id``, the highest id
+    seen, and ``missing``, the ids of the ``lookback`` below it not seen
+    yet. Those may belong to transactions still open, or to ones that
+    rolled back or were deleted, and are read again until they leave the
+    window."""
+
+    def __init__(self, last_id=0, missing=(), lookback=None):
+        self.lookback = getattr(settings, 'EVENTS_LOOKBACK', 100) if lookback is None else lookback
+        self.last_id = last_id
+        self.missing = {i for i in missing if last_id - self.lookback < i < last_id}
+
+    @classmethod
+    def parse(cls, value):
+        """The position of a ``str()``, raises ``ValueError`` when malformed."""
+        last_id, _, missing = value.partition(':')
+        last_id = int(last_id)
+        missing = [int(i) for i in missing.split(',')] if missing else []
+        if last_id < 0 or any(i < 1 for i in missing):
+            raise ValueError(value)
+        return cls(last_id, missing)
+
+    @classmethod
+    def current(cls):
+        """The position of a stream that has seen everything committed."""
+        position = cls(last_event_id())
+        floor = max(position.last_id - position.lookback, 0)
+        seen = UpdateHistory.objects.filter(id__gt=floor, id__lt=position.last_id).values_list('id', flat=True)
+        position.missing = set(range(floor + 1, position.last_id)) - set(seen)
+        return position
+
+    def add(self, event_id):
+        """Move past ``event_id``, returns whether it had not been seen."""
+        if event_id > self.last_id:
+            self.missing.update(range(max(self.last_id, event_id - self.lookback) + 1, event_id))
+            self.last_id = event_id
+            floor = event_id - self.lookback
+            self.missing = {i for i in self.missing if i > floor}
+            return True
+        if event_id in self.missing:
+            self.missing.discard(event_id)
+            return True
+        return False
+
+    def events(self, limit):
+        """Up to ``limit`` events not seen yet, oldest first."""
+        return events_after(self.last_id, limit, sorted(self.missing))
+
+    def __str__(self):
+        if not self.missing:
+            return str(self.last_id)
+        return '%d:%s' % (self.last_id, ','.join(map(str, sorted(self.missing))))
+
+
+def publish_history(entries):
+    """Publish the events of saved ``UpdateHistory`` entries once the
+    current transaction commits. Their ``student`` must be loaded."""
+    events = [
+        history_event(
+            entry.id, entry.student.roll_no, entry.changes,
+            {field: getattr(entry.student, field) for field in FLAG_FIELDS},
+        )
+        for entry in entries if entry.id is not None
+    ]
+    if events:
+        broadcaster = get_broadcaster()
+        transaction.on_commit(lambda: broadcaster.publish(events), robust=True)
+
+
+def format_event(event, position):
+    data = json.dumps(
+        {key: value for key, value in event.items() if key != 'id'}, separators=(',', ':'), ensure_ascii=False
+    )
+    return 'id: %s\nevent: student\ndata: %s\n\n' % (position, data)
+
+
+class Subscription:
+    """Queue of events for one stream, read in the event loop it was
+    created in. A subscriber falling ``EVENTS_QUEUE_SIZE`` events behind is
+    cut off, ``get()`` then returns ``None`` and the client resumes from
+    the last event it got."""
+
+    def __init__(self, broadcaster, maxsize):
+        self.broadcaster = broadcaster
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, events):
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflowed = True
+                return
+
+    async def get(self):
+        # Events queued before the overflow are still delivered
+        if self.overflowed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    def publish(self, events):
+        """Send ``events`` to the subscribers, callable from any thread."""
+        raise NotImplementedError
+
+    def subscribe(self):
+        """A new ``Subscription``, called in the stream's event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalBroadcaster(Broadcaster):
+    """Fans out the events published in this process to its streams."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self.queue_size = getattr(settings, 'EVENTS_QUEUE_SIZE', 1000)
+
+    def publish(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                # Sync views publish from worker threads, the queue belongs to the loop
+                subscription.loop.call_soon_threadsafe(subscription.put, events)
+            except RuntimeError:
+                # Loop closed under a stream that was never closed itself
+                self.unsubscribe(subscription)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+class HistoryPollingBroadcaster(LocalBroadcaster):
+    """Reads new change sets from ``UpdateHistory`` instead of relying on
+    publishers, so streams see the writes of every worker and process.
+
+    One poll per ``EVENTS_POLL_INTERVAL`` seconds and event loop, however
+    many streams are open, and none while there are no streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.interval = getattr(settings, 'EVENTS_POLL_INTERVAL', 1.0)
+        self.batch_size = getattr(settings, 'EVENTS_REPLAY_LIMIT', 1000)
+        self._pollers = {}
+
+    def publish(self, events):
+        # Picked up by the poll
+        pass
+
+    def subscribe(self):
+        subscription = super().subscribe()
+        loop = subscription.loop
+        with self._lock:
+            if loop not in self._pollers:
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+        return subscription
+
+    async def _poll(self, loop):
+        try:
+            position = await sync_to_async(EventPosition.current)()
+            while True:
+                await asyncio.sleep(self.interval)
+                with self._lock:
+                    # Checked and dropped under the lock, a new stream
+                    # either sees this poller running or starts its own.
+                    if not any(s.loop is loop for s in self._subscriptions):
+                        del self._pollers[loop]
+                        return
+                try:
+                    events = await sync_to_async(position.events)(self.batch_size)
+                except Exception:
+                    logger.exception('Polling change events failed')
+                    continue
+                # Ids missing from the last poll come back once committed
+                events = [event for event in events if position.add(event['id'])]
+                if events:
+                    with self._lock:
+                        subscriptions = [s for s in self._subscriptions if s.loop is loop]
+                    for subscription in subscriptions:
+                        subscription.put(events)
+        except BaseException:
+            with self._lock:
+                self._pollers.pop(loop, None)
+            raise
+
+
+async def event_stream(position=None):
+    """Server-sent events of the change sets after the ``EventPosition``
+    ``position``, then of new ones as they are published, with a comment
+    line every ``EVENTS_KEEPALIVE`` seconds of silence.
+
+    Without ``position`` the stream starts with the next change. A client
+    more than ``EVENTS_REPLAY_LIMIT`` events behind gets a ``reset`` event
+    instead of the replay and reloads its data.
+    """
+    if position is None:
+        position = await sync_to_async(EventPosition.current)()
+    subscription = get_broadcaster().subscribe()
+    try:
+        yield 'retry: %d\n\n' % getattr(settings, 'EVENTS_RETRY_MS', 3000)
+        limit = getattr(settings, 'EVENTS_REPLAY_LIMIT', 1000)
+        # Read after subscribing, events published meanwhile are both
+        # replayed and queued, the queued copies are skipped below as seen.
+        events = await sync_to_async(position.events)(limit + 1)
+        if len(events) > limit:
+            position = await sync_to_async(EventPosition.current)()
+            yield 'id: %s\nevent: reset\ndata: {}\n\n' % position
+        else:
+            for event in events:
+                position.add(event['id'])
+                yield format_event(event, position)
+        keepalive = getattr(settings, 'EVENTS_KEEPALIVE', 15)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                # Cut off for falling behind, the client reconnects and resumes
+                return
+            if position.add(event['id']):
+                yield format_event(event, position)
+    finally:
+        subscription.close()
+
+
+@lru_cache(maxsize=None)
+def get_broadcaster(path=None):
+    return import_string(path or settings.EVENTS_BROADCASTER)()
+
+
+@receiver(setting_changed)
+def _reset_broadcaster(setting, **kwargs):
+    if setting in ('EVENTS_BROADCASTER', 'EVENTS_QUEUE_SIZE', 'EVENTS_POLL_INTERVAL', 'EVENTS_REPLAY_LIMIT',
+                   'EVENTS_LOOKBACK'):
+        get_broadcaster.cache_clear()
@@ -0,0 +1,75 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Student, UpdateHistory
+from .serializers import StudentSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+
+STUDENT_EXPORT_FIELDS = StudentSerializer.Meta.fields + ['created_at', 'updated_at']
+# History is exported one row per changed field, the change set id repeats
+HISTORY_EXPORT_FIELDS = ['id', 'student_id', 'student__roll_no', 'field_name',
+                         'old_value', 'new_value', 'update_date']
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def student_export_queryset():
+    return Student.objects.order_by('id').values_list(*STUDENT_EXPORT_FIELDS)
+
+
+def history_export_queryset():
+    return UpdateHistory.objects.order_by('id').values_list(
+        'id', 'student_id', 'student__roll_no', 'changes', 'update_date'
+    )
+
+
+def iter_history_rows(rows):
+    """Flatten ``history_export_queryset()`` rows to ``HISTORY_EXPORT_FIELDS``."""
+    for id_, student_id, roll_no, changes, update_date in rows:
+        for field_name, (old_value, new_value) in changes.items():
+            yield id_, student_id, roll_no, field_name, old_value, new_value, update_date
+
+
+def _header(fields):
+    return [field.replace('student__', '') for field in fields]
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(_header(fields))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows, fields):
+    keys = _header(fields)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(keys, row))) + '\n'
+
+
+def iter_export(queryset, fields, export_format, chunk_size=EXPORT_CHUNK_SIZE, flatten=None):
+    """Stream ``queryset`` as lines of ``export_format``.
+
+    ``flatten`` optionally maps the queryset rows to rows matching ``fields``.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('format must be one of: %s' % ', '.join(EXPORT_FORMATS))
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if flatten is not None:
+        rows = flatten(rows)
+    if export_format == 'csv':
+        return iter_csv(rows, fields)
+    return iter_ndjson(rows, fields)
@@ -0,0 +1,72 @@
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+STUDENT_BOOLEAN_FILTERS = ['is_data_verified', 'is_mobile_verified']
+STUDENT_EXACT_FILTERS = ['district', 'taluka', 'field_of_study']
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+FALSE_VALUES = {'0', 'false', 'no'}
+
+
+def parse_bool(name, value):
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError('%s must be true or false' % name)
+
+
+def _apply_date_range(queryset, params, field):
+    for param, lookup in (('updated_after', 'gte'), ('updated_before', 'lte')):
+        value = params.get(param)
+        if not value:
+            continue
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            queryset = queryset.filter(**{'%s__%s' % (field, lookup): parsed})
+            continue
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError('%s must be an ISO date or datetime' % param)
+        queryset = queryset.filter(**{'%s__date__%s' % (field, lookup): parsed})
+    return queryset
+
+
+def filter_students(queryset, params, prefix=''):
+    """Apply the shared student filters from a query-param style mapping.
+
+    Raises ``ValueError`` for malformed values.
+    """
+    for name in STUDENT_BOOLEAN_FILTERS:
+        if params.get(name):
+            queryset = queryset.filter(**{prefix + name: parse_bool(name, params[name])})
+    for name in STUDENT_EXACT_FILTERS:
+        if params.get(name):
+            queryset = queryset.filter(**{prefix + name: params[name]})
+    if not prefix:
+        queryset = _apply_date_range(queryset, params, 'updated_at')
+    return queryset
+
+
+def filter_history(queryset, params):
+    if params.get('roll_no'):
+        queryset = queryset.filter(student__roll_no=params['roll_no'])
+    queryset = filter_students(queryset, params, prefix='student__')
+    return _apply_date_range(queryset, params, 'update_date')
+
+
+def filter_since(queryset, params, field='update_date'):
+    """Keep rows strictly newer than the ``since`` timestamp."""
+    value = params.get('since')
+    if not value:
+        return queryset
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError('since must be an ISO datetime')
+    if timezone.is_naive(parsed):
+        # Timestamps without an offset are read as UTC
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return queryset.filter(**{'%s__gt' % field: parsed})
@@ -0,0 +1,151 @@
+import csv
+import json
+import os
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.json')
+
+KINDS = ('district', 'taluka', 'city', 'pincode')
+
+# Header aliases accepted when loading a CSV directory such as the India Post
+# pincode directory (one row per post office).
+CSV_COLUMNS = {
+    'pincode': ('pincode', 'pin_code', 'pin'),
+    'district': ('district', 'districtname', 'district_name'),
+    'taluka': ('taluka', 'taluk', 'tehsil', 'subdistrict', 'sub_district'),
+    'city': ('city', 'officename', 'office_name'),
+}
+
+
+class _SortedIndex:
+    """Case-insensitive prefix index over a sorted pair of parallel lists."""
+
+    def __init__(self, names):
+        pairs = sorted({name.casefold(): name for name in names if name}.items())
+        self.keys = [key for key, _ in pairs]
+        self.names = [name for _, name in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def canonical(self, value):
+        key = value.casefold()
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.names[i]
+        return None
+
+    def prefix(self, prefix, limit):
+        key = prefix.casefold()
+        results = []
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and len(results) < limit and self.keys[i].startswith(key):
+            results.append(self.names[i])
+            i += 1
+        return results
+
+
+class Gazetteer:
+    """Districts, talukas, cities and pincodes held in memory.
+
+    Autocomplete runs a binary search over sorted arrays, pincode lookups
+    are a dict hit. ``pincode_areas`` maps a pincode to its
+    ``(district, taluka)`` and ``taluka_districts`` a taluka to its district,
+    both may be empty when the dataset has no such mapping.
+    """
+
+    def __init__(self, districts=(), talukas=(), cities=(), pincodes=(),
+                 pincode_areas=None, taluka_districts=None):
+        self.pincode_areas = {
+            pincode: (area.get('district'), area.get('taluka'))
+            for pincode, area in (pincode_areas or {}).items()
+        }
+        self.taluka_districts = {
+            taluka.casefold(): district for taluka, district in (taluka_districts or {}).items()
+        }
+        districts = set(districts) | set(self.taluka_districts.values())
+        districts |= {district for district, _ in self.pincode_areas.values()}
+        talukas = set(talukas) | set(taluka_districts or {})
+        talukas |= {taluka for _, taluka in self.pincode_areas.values()}
+        self.indexes = {
+            'district': _SortedIndex(districts),
+            'taluka': _SortedIndex(talukas),
+            'city': _SortedIndex(cities),
+            'pincode': _SortedIndex(set(pincodes) | set(self.pincode_areas)),
+        }
+
+    def autocomplete(self, kind, prefix, limit=10):
+        return self.indexes[kind].prefix(prefix, limit)
+
+    def canonical(self, kind, value):
+        return self.indexes[kind].canonical(value)
+
+    def is_known(self, kind):
+        """Whether the dataset lists values of ``kind`` at all."""
+        return len(self.indexes[kind]) > 0
+
+    def lookup_pincode(self, pincode):
+        district, taluka = self.pincode_areas.get(pincode, (None, None))
+        if district is None and self.canonical('pincode', pincode) is None:
+            return None
+        return {'pincode': pincode, 'district': district, 'taluka': taluka}
+
+    def district_of_taluka(self, taluka):
+        return self.taluka_districts.get(taluka.casefold())
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(
+            districts=data.get('districts', ()),
+            talukas=data.get('talukas', ()),
+            cities=data.get('cities', ()),
+            pincodes=data.get('pincodes', ()),
+            pincode_areas=data.get('pincode_areas'),
+            taluka_districts=data.get('taluka_districts'),
+        )
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            headers = {h.strip().lower(): h for h in reader.fieldnames or ()}
+            columns = {
+                name: next((headers[a] for a in aliases if a in headers), None)
+                for name, aliases in CSV_COLUMNS.items()
+            }
+            cities, pincode_areas, taluka_districts = set(), {}, {}
+            for row in reader:
+                values = {
+                    name: (row[column] or '').strip().title() if column else ''
+                    for name, column in columns.items()
+                }
+                pincode = (row[columns['pincode']] or '').strip() if columns['pincode'] else ''
+                district, taluka = values['district'] or None, values['taluka'] or None
+                if pincode:
+                    pincode_areas.setdefault(pincode, {'district': district, 'taluka': taluka})
+                if taluka and district:
+                    taluka_districts.setdefault(taluka, district)
+                if values['city']:
+                    cities.add(values['city'])
+        return cls(cities=cities, pincode_areas=pincode_areas, taluka_districts=taluka_districts)
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer():
+    path = getattr(settings, 'GAZETTEER_PATH', None) or DEFAULT_GAZETTEER_PATH
+    if path.lower().endswith('.csv'):
+        return Gazetteer.from_csv(path)
+    return Gazetteer.from_json(path)
+
+
+@receiver(setting_changed)
+def _reset_gazetteer(setting, **kwargs):
+    if setting == 'GAZETTEER_PATH':
+        get_gazetteer.cache_clear()
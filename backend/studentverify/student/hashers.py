@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+
+
+class StudentPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with the work factor taken from ``STUDENT_PASSWORD_ITERATIONS``.
+
+    Student logins arrive in bursts, so their cost is tuned separately from
+    admin accounts. Changing the setting rehashes passwords on next login.
+    """
+    algorithm = 'student_pbkdf2_sha256'
+
+    @property
+    def iterations(self):
+        return settings.STUDENT_PASSWORD_ITERATIONS
+
+
+def hash_student_password(raw_password):
+    return make_password(raw_password, hasher=settings.STUDENT_PASSWORD_HASHER)
+
+
+def check_student_password(raw_password, encoded, setter=None):
+    return check_password(raw_password, encoded, setter, preferred=settings.STUDENT_PASSWORD_HASHER)
+
+
+def hash_student_passwords(raw_passwords, workers=None):
+    """Hash many passwords in parallel.
+
+    hashlib releases the GIL while running PBKDF2, so a thread pool scales
+    across cores.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_student_password, raw_passwords))
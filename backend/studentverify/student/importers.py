@@ -0,0 +1,204 @@
+import csv
+import io
+import os
+from datetime import datetime
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_students
+from .duplicates import refresh_duplicates_on_commit
+from .hashers import hash_student_passwords
+from .models import Student
+from .serializers import StudentImportSerializer
+from .stats import STAT_FIELDS, record_changes, stat_state
+
+# Columns taken from the roster file. Verification flags are never imported,
+# new rows start unverified and existing rows keep their current flags.
+IMPORT_FIELDS = [
+    'roll_no', 'password', 'name', 'date_of_birth', 'mobile_number', 'email',
+    'father_mobile_number', 'field_of_study', 'address', 'taluka', 'city',
+    'district', 'pincode',
+]
+NULLABLE_FIELDS = {'email', 'taluka', 'city', 'district', 'pincode'}
+
+
+def _normalize_header(header):
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def iter_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [_normalize_header(h) for h in next(reader, [])]
+        for line_no, values in enumerate(reader, start=2):
+            if any(values):
+                yield line_no, dict(zip(header, values))
+
+
+def _cell_to_str(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_rows(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError('openpyxl is required to import .xlsx files')
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(h) for h in next(rows, ())]
+        for line_no, values in enumerate(rows, start=2):
+            values = [_cell_to_str(v) for v in values]
+            if any(values):
+                yield line_no, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return iter_xlsx_rows(path)
+    return iter_csv_rows(path)
+
+
+def validate_rows(rows):
+    """Yield ``(line_no, validated_data, errors)`` for every roster row."""
+    for line_no, row in rows:
+        data = {}
+        for field in IMPORT_FIELDS:
+            value = (row.get(field) or '').strip()
+            if value or field not in NULLABLE_FIELDS:
+                data[field] = value
+            else:
+                data[field] = None
+        serializer = StudentImportSerializer(data=data)
+        if serializer.is_valid():
+            yield line_no, serializer.validated_data, None
+        else:
+            yield line_no, data, serializer.errors
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _dedupe(records):
+    # A single upsert statement cannot touch the same roll_no twice, the last
+    # occurrence in the file wins.
+    return list({record['roll_no']: record for record in records}.values())
+
+
+def copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if value is None else value for value in row])
+    buffer.seek(0)
+
+    sql = "COPY %s (%s) FROM STDIN WITH (FORMAT csv, NULL '\\N')" % (
+        table, ', '.join(columns)
+    )
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        # psycopg2
+        raw.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def _load_postgresql(records, now):
+    qn = connection.ops.quote_name
+    table = qn(Student._meta.db_table)
+    staging = qn('student_import_staging')
+    fields = IMPORT_FIELDS + ['is_data_verified', 'is_mobile_verified', 'created_at', 'updated_at']
+    columns = [qn(Student._meta.get_field(f).column) for f in fields]
+    update_columns = [qn(Student._meta.get_field(f).column) for f in IMPORT_FIELDS[1:] + ['updated_at']]
+
+    with connection.cursor() as cursor:
+        # ON COMMIT DROP only fires on a real commit. Inside an outer
+        # transaction, load_batch's atomic() is a savepoint and the previous
+        # batch's table is still there.
+        cursor.execute('DROP TABLE IF EXISTS %s' % staging)
+        cursor.execute(
+            'CREATE TEMP TABLE %s ON COMMIT DROP AS SELECT %s FROM %s WITH NO DATA'
+            % (staging, ', '.join(columns), table)
+        )
+        copy_rows(cursor, staging, columns, (
+            [record[f] for f in IMPORT_FIELDS] + [False, False, now, now]
+            for record in records
+        ))
+        cursor.execute(
+            'INSERT INTO %s (%s) SELECT %s FROM %s ON CONFLICT (%s) DO UPDATE SET %s' % (
+                table, ', '.join(columns), ', '.join(columns), staging,
+                qn(Student._meta.get_field('roll_no').column),
+                ', '.join('%s = EXCLUDED.%s' % (c, c) for c in update_columns),
+            )
+        )
+
+
+def _load_orm(records, now):
+    Student.objects.bulk_create(
+        [Student(created_at=now, updated_at=now, **record) for record in records],
+        update_conflicts=True,
+        unique_fields=['roll_no'],
+        update_fields=IMPORT_FIELDS[1:] + ['updated_at'],
+    )
+
+
+def load_batch(records):
+    """Upsert validated student records keyed on ``roll_no``.
+
+    On PostgreSQL the batch is streamed with ``COPY`` into a temporary
+    staging table and merged with ``INSERT ... ON CONFLICT``, other backends
+    fall back to ``bulk_create(update_conflicts=True)``.
+    """
+    records = _dedupe(records)
+    if not records:
+        return 0
+
+    for record, encoded in zip(records, hash_student_passwords([r['password'] for r in records])):
+        record['password'] = encoded
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            row['roll_no']: row
+            for row in Student.objects.filter(roll_no__in=[r['roll_no'] for r in records])
+            .values('roll_no', *STAT_FIELDS)
+        }
+        if connection.vendor == 'postgresql':
+            _load_postgresql(records, now)
+        else:
+            _load_orm(records, now)
+        # Bulk loads bypass post_save, so cached profiles are dropped here.
+        invalidate_students([record['roll_no'] for record in records])
+        # Imports never change the verification flags, existing rows keep theirs.
+        record_changes([
+            (
+                stat_state(existing[r['roll_no']]) if r['roll_no'] in existing else None,
+                stat_state(dict(existing.get(r['roll_no'], {}), **r)),
+            )
+            for r in records
+        ])
+        refresh_duplicates_on_commit(
+            Student.objects.filter(roll_no__in=[r['roll_no'] for r in records]).values_list('id', flat=True)
+        )
+    return len(records)
@@ -0,0 +1,126 @@
+"""Minimal asyncio HTTP/1.1 load generator.
+
+Each virtual user keeps one keep-alive connection open, so thousands of
+concurrent users cost one socket each and no threads. Used by the
+``loadtest`` command to compare a WSGI and an ASGI deployment.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+
+class HTTPConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+
+    async def _read_body(self, headers):
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    return b''.join(chunks)
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+        if 'content-length' in headers:
+            return await self.reader.readexactly(int(headers['content-length']))
+        return await self.reader.read()
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send one request and return ``(status, headers, body)``."""
+        if self.writer is None:
+            await self._connect()
+        lines = ['%s %s HTTP/1.1' % (method, path), 'Host: %s:%s' % (self.host, self.port)]
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode()
+            lines += ['Content-Type: application/json', 'Content-Length: %d' % len(payload)]
+        lines += ['%s: %s' % item for item in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        response_headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                response_headers[name.strip().lower()] = value.strip()
+        response_body = await self._read_body(response_headers)
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return int(status_line.split()[1]), response_headers, response_body
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_load(base_url, make_request, total, concurrency):
+    """Issue ``total`` requests from ``concurrency`` virtual users.
+
+    ``make_request(i)`` returns ``(method, path, body, headers)`` for the
+    i-th request, ``path`` is relative to ``base_url``. Non-2xx/3xx responses
+    and connection failures count as errors.
+    """
+    url = urlsplit(base_url)
+    prefix = url.path.rstrip('/')
+    counter = iter(range(total))
+    latencies = []
+    errors = 0
+
+    async def user():
+        nonlocal errors
+        connection = HTTPConnection(url.hostname, url.port or 80)
+        try:
+            for i in counter:
+                method, path, body, headers = make_request(i)
+                started = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request(method, prefix + path, body, headers)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    await connection.close()
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors += 1
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
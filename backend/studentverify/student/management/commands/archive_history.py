@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from student.archive import (
+    ARCHIVE_BATCH_SIZE, archive_history, drop_expired_partitions, ensure_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = ('Moves update history older than the retention window into the compressed '
+            'archive table (or NDJSON.gz files), drops emptied yearly partitions and '
+            'creates the partitions for the coming year. Meant to run from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.HISTORY_RETENTION_DAYS,
+                            help='Keep this many days of history in the hot table')
+        parser.add_argument('--directory', default=settings.HISTORY_ARCHIVE_DIR,
+                            help='Write NDJSON.gz files here instead of the archive table')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days must not be negative and --batch-size must be positive')
+
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        for name in ensure_partitions([now.year, now.year + 1]):
+            self.stdout.write('Created partition %s' % name)
+
+        moved = archive_history(cutoff, options['directory'], options['batch_size'])
+        for name in drop_expired_partitions(cutoff):
+            self.stdout.write('Dropped partition %s' % name)
+        self.stdout.write(self.style.SUCCESS(
+            'Archived %d change sets older than %s' % (moved, cutoff.isoformat())
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = ('Runs an API benchmark scenario against the configured database. '
+            'Synthetic rows are created in a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument('--count', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count must be positive')
+
+        rows = SCENARIOS[options['scenario']](options['count'])
+        # Requests run sequentially in this process, so req/s is per core.
+        self.stdout.write('%-30s %10s %10s %12s %10s' % ('case', 'requests', 'seconds', 'req/s/core', 'queries'))
+        for name, requests, seconds, queries in rows:
+            self.stdout.write('%-30s %10d %10.3f %12.1f %10d' % (
+                name, requests, seconds, requests / seconds if seconds else 0, queries
+            ))
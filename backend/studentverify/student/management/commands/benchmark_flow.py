@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from student.benchmarks import FLOW_STEPS, cohort_students, compare_with_baseline, run_flow
+
+
+class Command(BaseCommand):
+    help = ('Drives the login -> retrieve -> PATCH -> verify_otp -> history flow of the app '
+            'in-process against the configured database (SQLite or PostgreSQL), using '
+            'students created by seed_cohort. Reports latency percentiles, throughput and '
+            'queries per request, and optionally compares them with a stored baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8, help='Concurrent virtual users (threads)')
+        parser.add_argument('--iterations', type=int, default=20, help='Flows per user')
+        parser.add_argument('--students', type=int, default=1000,
+                            help='Cohort students to spread the flows over')
+        parser.add_argument('--baseline', help='JSON file of an earlier run to compare against')
+        parser.add_argument('--save-baseline', help='Write this run to a JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help='Allowed relative p95 / throughput regression')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['iterations'] < 1:
+            raise CommandError('--users and --iterations must be positive')
+        roll_nos = list(cohort_students().order_by('id').values_list('roll_no', flat=True)[:options['students']])
+        if not roll_nos:
+            raise CommandError('No cohort students, run seed_cohort first')
+
+        result = run_flow(roll_nos, options['users'], options['iterations'])
+        result['config'] = {
+            'users': options['users'],
+            'iterations': options['iterations'],
+            'students': len(roll_nos),
+            'vendor': connection.vendor,
+        }
+
+        self.stdout.write('%-10s %9s %7s %9s %9s %9s %9s' % (
+            'step', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'
+        ))
+        for step in FLOW_STEPS:
+            row = result['steps'][step]
+            self.stdout.write('%-10s %9d %7d %9.1f %9.1f %9.1f %9.2f' % (
+                step, row['requests'], row['errors'], row['p50_ms'], row['p95_ms'], row['p99_ms'], row['queries']
+            ))
+        self.stdout.write('%d requests in %.2fs, %.1f req/s (%s, %d users)' % (
+            result['requests'], result['seconds'], result['throughput'], connection.vendor, options['users']
+        ))
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_with_baseline(baseline, result, options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR('Regression: %s' % regression))
+            if regressions:
+                raise CommandError('%d regressions against %s' % (len(regressions), options['baseline']))
+            self.stdout.write(self.style.SUCCESS('No regressions against %s' % options['baseline']))
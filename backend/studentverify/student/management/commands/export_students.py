@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.exporters import (
+    EXPORT_CHUNK_SIZE, EXPORT_FORMATS, HISTORY_EXPORT_FIELDS, STUDENT_EXPORT_FIELDS,
+    history_export_queryset, iter_export, iter_history_rows, student_export_queryset,
+)
+from student.filters import filter_history, filter_students
+
+
+class Command(BaseCommand):
+    help = 'Streams students or their update history to CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', action='store_true', help='Export UpdateHistory instead of students')
+        parser.add_argument('--format', dest='export_format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='Output file (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--is-data-verified', dest='is_data_verified')
+        parser.add_argument('--is-mobile-verified', dest='is_mobile_verified')
+        parser.add_argument('--district')
+        parser.add_argument('--roll-no', dest='roll_no', help='Only with --history')
+        parser.add_argument('--updated-after', dest='updated_after', help='ISO date or datetime')
+        parser.add_argument('--updated-before', dest='updated_before', help='ISO date or datetime')
+
+    def handle(self, *args, **options):
+        flatten = None
+        if options['history']:
+            queryset, fields, filter_func = history_export_queryset(), HISTORY_EXPORT_FIELDS, filter_history
+            flatten = iter_history_rows
+        else:
+            queryset, fields, filter_func = student_export_queryset(), STUDENT_EXPORT_FIELDS, filter_students
+
+        try:
+            queryset = filter_func(queryset, options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        lines = iter_export(queryset, fields, options['export_format'], options['chunk_size'], flatten)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from student.duplicates import detect_duplicates
+from student.models import DuplicateCandidate
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the duplicate detection index over all students and lists the '
+            'likely duplicates. Later writes keep it current, run this after deploying '
+            'it or changing DUPLICATE_THRESHOLD. Pairs are reviewed in the admin.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Open candidates to list')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        pairs = detect_duplicates()
+        self.stdout.write('Found %d candidate pairs in %.2fs' % (len(pairs), time.perf_counter() - started))
+
+        candidates = (
+            DuplicateCandidate.objects.filter(status=DuplicateCandidate.OPEN)
+            .select_related('student_a', 'student_b')[:options['limit']]
+        )
+        for candidate in candidates:
+            self.stdout.write('%.2f  %s %s / %s %s  (%s)' % (
+                candidate.score,
+                candidate.student_a.roll_no, candidate.student_a.name,
+                candidate.student_b.roll_no, candidate.student_b.name,
+                ', '.join(candidate.reasons),
+            ))
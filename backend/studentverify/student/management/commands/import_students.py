@@ -0,0 +1,70 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student.importers import batched, iter_rows, load_batch, validate_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports a student roster from a CSV or Excel (.xlsx) file, upserting on roll_no'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .xlsx roster file')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--rejects', help='Write rejected rows and their errors to this CSV file')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        rejects_file = None
+        rejects_writer = None
+        if options['rejects']:
+            rejects_file = open(options['rejects'], 'w', newline='', encoding='utf-8')
+            rejects_writer = csv.writer(rejects_file)
+            rejects_writer.writerow(['line', 'roll_no', 'errors'])
+
+        total_loaded = 0
+        total_rejected = 0
+        started = time.perf_counter()
+        try:
+            rows = validate_rows(iter_rows(options['path']))
+            for batch_no, batch in enumerate(batched(rows, batch_size), start=1):
+                batch_started = time.perf_counter()
+                records = []
+                rejected = 0
+                for line_no, data, errors in batch:
+                    if errors is None:
+                        records.append(data)
+                        continue
+                    rejected += 1
+                    message = '; '.join(
+                        '%s: %s' % (field, ' '.join(str(e) for e in errs))
+                        for field, errs in errors.items()
+                    )
+                    if rejects_writer:
+                        rejects_writer.writerow([line_no, data.get('roll_no'), message])
+                    else:
+                        self.stderr.write('Line %s rejected: %s' % (line_no, message))
+
+                loaded = load_batch(records)
+                elapsed = time.perf_counter() - batch_started
+                total_loaded += loaded
+                total_rejected += rejected
+                self.stdout.write(
+                    'Batch %d: %d loaded, %d rejected in %.2fs (%.0f rows/s)'
+                    % (batch_no, loaded, rejected, elapsed, len(batch) / elapsed if elapsed else 0)
+                )
+        except (OSError, ImportError) as e:
+            raise CommandError(str(e))
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d students, rejected %d rows in %.2fs'
+            % (total_loaded, total_rejected, elapsed)
+        ))
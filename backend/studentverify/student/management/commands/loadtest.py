@@ -0,0 +1,102 @@
+import asyncio
+import math
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from student.benchmarks import BENCHMARK_PASSWORD, cohort_students
+from student.loadtest import run_load
+from student.throttling import parse_rate
+
+SCENARIOS = ('login', 'profile', 'history')
+# Cohort students requested by the read scenarios when no --roll-no is given
+COHORT_SAMPLE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives concurrent HTTP load against one or more running deployments and '
+        'reports throughput and latency percentiles for each. To compare WSGI and '
+        'ASGI start both servers against the same database, e.g.\n'
+        '  gunicorn studentverify.wsgi -w 4 -b 127.0.0.1:8000\n'
+        '  uvicorn studentverify.asgi:application --workers 4 --port 8001\n'
+        'then run\n'
+        '  manage.py loadtest --target wsgi=http://127.0.0.1:8000/api '
+        '--target asgi=http://127.0.0.1:8001/api/async\n'
+        'Without --roll-no the students of the seed_cohort cohort are requested. '
+        'The login scenario then spreads its requests over enough of them that '
+        'no roll number runs into its login throttle.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                            help='Base URL of the API, repeat to compare deployments')
+        parser.add_argument('--scenario', choices=SCENARIOS, default='profile')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--roll-no', action='append', dest='roll_nos',
+                            help='Existing roll number to request, repeat for several')
+        parser.add_argument('--password',
+                            help='Password shared by the --roll-no students (login scenario)')
+
+    def _roll_nos(self, scenario, requests, roll_nos):
+        """The roll numbers to request, the given ones or a cohort sample."""
+        needed = COHORT_SAMPLE
+        if scenario == 'login':
+            # Every roll number has its own bucket, a burst may use it up once
+            capacity, _ = parse_rate(settings.THROTTLE_RATES['login']['roll_no'])
+            needed = math.ceil(requests / capacity)
+            ip_capacity, _ = parse_rate(settings.THROTTLE_RATES['login']['ip'])
+            if requests > ip_capacity:
+                self.stderr.write(
+                    'All requests come from one address, past %d logins they are throttled '
+                    "unless the servers run with a higher THROTTLE_RATES['login']['ip']." % ip_capacity
+                )
+            if roll_nos and len(roll_nos) < needed:
+                self.stderr.write(
+                    '%d roll numbers allow %d logins before the roll number throttle rejects '
+                    'them, pass at least %d.' % (len(roll_nos), len(roll_nos) * capacity, needed)
+                )
+        if roll_nos:
+            return roll_nos
+        roll_nos = list(cohort_students().order_by('id').values_list('roll_no', flat=True)[:needed])
+        if not roll_nos or (scenario == 'login' and len(roll_nos) < needed):
+            raise CommandError(
+                'Pass --roll-no or seed a cohort of at least %d students with seed_cohort' % needed
+            )
+        return roll_nos
+
+    def _request_factory(self, scenario, roll_nos, password):
+        def make_request(i):
+            roll_no = roll_nos[i % len(roll_nos)]
+            if scenario == 'login':
+                return 'POST', '/login/', {'roll_no': roll_no, 'password': password}, None
+            if scenario == 'history':
+                return 'GET', '/students/%s/history/' % roll_no, None, None
+            return 'GET', '/students/%s/' % roll_no, None, None
+        return make_request
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be positive')
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError('--target must look like name=http://host:port/path')
+            targets.append((name, url))
+
+        roll_nos = self._roll_nos(options['scenario'], options['requests'], options['roll_nos'])
+        password = options['password']
+        if password is None:
+            password = '' if options['roll_nos'] else BENCHMARK_PASSWORD
+        make_request = self._request_factory(options['scenario'], roll_nos, password)
+        self.stdout.write('%-10s %10s %8s %10s %10s %10s %10s %10s' % (
+            'target', 'requests', 'errors', 'seconds', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'
+        ))
+        for name, url in targets:
+            result = asyncio.run(run_load(url, make_request, options['requests'], options['concurrency']))
+            self.stdout.write('%-10s %10d %8d %10.3f %10.1f %10.1f %10.1f %10.1f' % (
+                name, result['requests'], result['errors'], result['seconds'], result['rps'],
+                result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from student.otp import purge_expired_otps
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired OTP codes'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_otps()
+        self.stdout.write(self.style.SUCCESS('Deleted %d expired OTPs' % deleted))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from student.stats import rebuild_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the verification summary counters from the student table'
+
+    def handle(self, *args, **options):
+        drifted = rebuild_statistics()
+        for dimension, value in drifted:
+            self.stdout.write('Corrected %s=%r' % (dimension, value))
+        self.stdout.write(self.style.SUCCESS('Rebuilt statistics, %d groups had drifted' % len(drifted)))
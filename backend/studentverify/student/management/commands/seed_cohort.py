@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student.benchmarks import clear_cohort, cohort_students, seed_cohort
+
+
+class Command(BaseCommand):
+    help = ('Bulk inserts a synthetic cohort of students with update history for '
+            'benchmarking, e.g. --students 100000 --history 20 for about 2M change sets. '
+            'Cohort students use the cohort.invalid e-mail domain and the password 123456.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--history', type=int, default=20, help='Average change sets per student')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, same seed gives the same data')
+        parser.add_argument('--clear', action='store_true', help='Delete an existing cohort first')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['history'] < 0:
+            raise CommandError('--students must be positive and --history not negative')
+        if options['clear']:
+            self.stdout.write('Deleted %d cohort students' % clear_cohort())
+        elif cohort_students().exists():
+            raise CommandError('A cohort already exists, pass --clear to replace it')
+
+        def progress(students, change_sets):
+            self.stdout.write('%d students, %d change sets' % (students, change_sets))
+
+        students, change_sets = seed_cohort(
+            options['students'], options['history'], options['seed'], progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded %d students and %d change sets' % (students, change_sets)
+        ))
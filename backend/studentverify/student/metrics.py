@@ -0,0 +1,286 @@
+"""Per-route request metrics, exported in the Prometheus text format.
+
+``InstrumentationMiddleware`` times each request and, through a database
+execute wrapper installed on every connection, counts its queries and the
+time spent in them. Serializers and the JSON renderer report their time
+with ``track_serialization()``. Per-request state lives in a context
+variable so it follows async views into the threads the ORM runs in.
+
+A streaming response is measured until its body is closed, the queries
+run while streaming count toward its request. Event streams stay open
+for as long as the client listens, they are measured to the headers.
+
+Metrics are kept per process, each worker serves its own numbers.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_seconds', 'serialize_seconds', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements = Counter()
+
+    def repeated_statements(self, threshold):
+        """SQL templates executed at least ``threshold`` times, the
+        signature of a query issued once per row of an outer query."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.db_seconds += time.perf_counter() - started
+        state.queries += 1
+        state.statements[sql] += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``record_query`` to the connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def track_serialization():
+    state = _current.get()
+    if state is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.serialize_seconds += time.perf_counter() - started
+
+
+@contextmanager
+def collect():
+    """Collect metrics of the code run inside the block, yields the
+    ``RequestMetrics`` being filled."""
+    state = RequestMetrics()
+    token = _current.set(state)
+    try:
+        yield state
+    finally:
+        _current.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield '%s_bucket{%s,le="%s"} %d' % (name, labels, bound, cumulative)
+        yield '%s_bucket{%s,le="+Inf"} %d' % (name, labels, self.count)
+        yield '%s_sum{%s} %s' % (name, labels, _number(self.sum))
+        yield '%s_count{%s} %d' % (name, labels, self.count)
+
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _labels(**labels):
+    return ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels.items())
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.queries = {}
+            self.requests = Counter()
+            self.db_seconds = Counter()
+            self.serialize_seconds = Counter()
+            self.n_plus_one = Counter()
+
+    def observe(self, route, method, status, seconds, state, n_plus_one):
+        key = (route, method)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(state.queries)
+            self.requests[(route, method, status)] += 1
+            self.db_seconds[key] += state.db_seconds
+            self.serialize_seconds[key] += state.serialize_seconds
+            if n_plus_one:
+                self.n_plus_one[key] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP studentverify_request_duration_seconds Request latency per route, streamed bodies included',
+                '# TYPE studentverify_request_duration_seconds histogram',
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                lines += histogram.samples(
+                    'studentverify_request_duration_seconds', _labels(route=route, method=method)
+                )
+            lines += [
+                '# HELP studentverify_request_queries SQL queries per request',
+                '# TYPE studentverify_request_queries histogram',
+            ]
+            for (route, method), histogram in sorted(self.queries.items()):
+                lines += histogram.samples('studentverify_request_queries', _labels(route=route, method=method))
+            counters = (
+                ('studentverify_requests_total', 'Requests per route and status', self.requests,
+                 ('route', 'method', 'status')),
+                ('studentverify_db_seconds_total', 'Time spent in SQL', self.db_seconds, ('route', 'method')),
+                ('studentverify_serialize_seconds_total', 'Time spent serializing and rendering',
+                 self.serialize_seconds, ('route', 'method')),
+                ('studentverify_n_plus_one_total', 'Requests that repeated one SQL statement',
+                 self.n_plus_one, ('route', 'method')),
+            )
+            for name, help_text, values, label_names in counters:
+                lines += ['# HELP %s %s' % (name, help_text), '# TYPE %s counter' % name]
+                for key, value in sorted(values.items()):
+                    lines.append('%s{%s} %s' % (name, _labels(**dict(zip(label_names, key))), _number(value)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+class InstrumentationMiddleware:
+    """Records latency, query count, DB and serialization time per route.
+
+    A request that runs one SQL statement ``METRICS_N_PLUS_ONE_THRESHOLD``
+    times or more is logged as a likely N+1 and, with
+    ``METRICS_N_PLUS_ONE_RAISE`` (meant for tests), fails.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with collect() as state:
+            response = self.get_response(request)
+        return self._measure(request, response, state, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect() as state:
+            response = await self.get_response(request)
+        return self._measure(request, response, state, started)
+
+    def _measure(self, request, response, state, started):
+        if response.streaming and not response.get('Content-Type', '').startswith('text/event-stream'):
+            content = response.streaming_content
+            if response.is_async:
+                response.streaming_content = self._astream(request, response, state, started, content)
+            else:
+                response.streaming_content = self._stream(request, response, state, started, content)
+        else:
+            self._finish(request, response, state, time.perf_counter() - started)
+        return response
+
+    def _stream(self, request, response, state, started, content):
+        try:
+            while True:
+                token = _current.set(state)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    _current.reset(token)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self._finish(request, response, state, time.perf_counter() - started)
+
+    async def _astream(self, request, response, state, started, content):
+        try:
+            while True:
+                token = _current.set(state)
+                try:
+                    chunk = await anext(content, None)
+                finally:
+                    _current.reset(token)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self._finish(request, response, state, time.perf_counter() - started)
+
+    def _finish(self, request, response, state, seconds):
+        route = route_name(request)
+        if route == 'metrics':
+            return
+        repeated = state.repeated_statements(getattr(settings, 'METRICS_N_PLUS_ONE_THRESHOLD', 10))
+        registry.observe(route, request.method, response.status_code, seconds, state, bool(repeated))
+        if repeated:
+            sql, count = repeated[0]
+            message = 'Possible N+1 on %s %s: %d x %s' % (request.method, route, count, sql)
+            if getattr(settings, 'METRICS_N_PLUS_ONE_RAISE', False):
+                raise NPlusOneDetected(message)
+            logger.warning(message)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that reports its time to the request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with track_serialization():
+            return super().render(data, accepted_media_type, renderer_context)
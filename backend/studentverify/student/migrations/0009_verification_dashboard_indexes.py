@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0008_student_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_data_verified', False)), fields=['district', 'id'], name='student_data_unverified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('is_mobile_verified', False)), fields=['district', 'id'], name='student_mobile_unverified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='updatehistory',
+            index=models.Index(fields=['student', '-update_date'], name='history_student_date_idx'),
+        ),
+    ]
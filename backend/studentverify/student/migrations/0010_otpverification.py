@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0009_verification_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OTPVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('otp', models.CharField(max_length=64)),
+                ('mobile_number', models.CharField(max_length=15)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('is_used', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='otp_verifications', to='student.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='otp_expires_at_idx'), models.Index(fields=['student', '-created_at'], name='otp_student_created_idx')],
+            },
+        ),
+    ]
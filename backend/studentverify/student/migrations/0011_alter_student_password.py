@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_otpverification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='password',
+            field=models.CharField(max_length=128),
+        ),
+    ]
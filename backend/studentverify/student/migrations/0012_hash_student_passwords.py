@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def _is_hashed(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _hash(raw_password):
+    return make_password(raw_password, hasher=settings.STUDENT_PASSWORD_HASHER)
+
+
+def hash_passwords(apps, schema_editor):
+    # Rehash plain-text passwords batch by batch, hashing each batch on a
+    # thread pool (PBKDF2 releases the GIL). Already hashed values are
+    # skipped so the migration can be re-run safely.
+    Student = apps.get_model('student', 'Student')
+    last_id = 0
+    with ThreadPoolExecutor() as executor:
+        while True:
+            batch = list(
+                Student.objects.filter(id__gt=last_id).order_by('id').only('id', 'password')[:BATCH_SIZE]
+            )
+            if not batch:
+                return
+            last_id = batch[-1].id
+            pending = [student for student in batch if not _is_hashed(student.password)]
+            for student, encoded in zip(pending, executor.map(_hash, [s.password for s in pending])):
+                student.password = encoded
+            Student.objects.bulk_update(pending, ['password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0011_alter_student_password'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_passwords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Rows written by one save were created a few microseconds apart, rows of a
+# student closer together than this are folded into one change set.
+CHANGE_SET_WINDOW = timedelta(seconds=1)
+
+
+def group_change_sets(apps, schema_editor):
+    # Walk the history in (student, date) order and fold the per-field rows
+    # of each save into the first row of the group, then drop the rest.
+    UpdateHistory = apps.get_model('student', 'UpdateHistory')
+    rows = (
+        UpdateHistory.objects.order_by('student_id', 'update_date', 'id')
+        .values_list('id', 'student_id', 'field_name', 'old_value', 'new_value', 'update_date')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    kept, redundant = [], []
+    head = None
+    for id_, student_id, field_name, old_value, new_value, update_date in rows:
+        if head is None or head[0] != student_id or update_date - head[1] > CHANGE_SET_WINDOW:
+            head = (student_id, update_date, UpdateHistory(id=id_, changes={}))
+            kept.append(head[2])
+        else:
+            redundant.append(id_)
+        head[2].changes[field_name] = [old_value, new_value]
+
+        if len(kept) >= BATCH_SIZE:
+            UpdateHistory.objects.bulk_update(kept[:-1], ['changes'])
+            kept = kept[-1:]
+        if len(redundant) >= BATCH_SIZE:
+            UpdateHistory.objects.filter(id__in=redundant).delete()
+            redundant = []
+    UpdateHistory.objects.bulk_update(kept, ['changes'])
+    UpdateHistory.objects.filter(id__in=redundant).delete()
+
+
+def split_change_sets(apps, schema_editor):
+    UpdateHistory = apps.get_model('student', 'UpdateHistory')
+    for change_set in UpdateHistory.objects.order_by('id').iterator(chunk_size=BATCH_SIZE):
+        fields = list(change_set.changes.items())
+        if not fields:
+            continue
+        (field_name, (old_value, new_value)), rest = fields[0], fields[1:]
+        UpdateHistory.objects.filter(id=change_set.id).update(
+            field_name=field_name, old_value=old_value, new_value=new_value
+        )
+        created = UpdateHistory.objects.bulk_create([
+            UpdateHistory(student_id=change_set.student_id, field_name=field, old_value=old, new_value=new)
+            for field, (old, new) in rest
+        ])
+        UpdateHistory.objects.filter(id__in=[row.id for row in created if row.id]).update(
+            update_date=change_set.update_date
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0012_hash_student_passwords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='updatehistory',
+            name='changes',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(group_change_sets, split_change_sets),
+        migrations.RemoveField(
+            model_name='updatehistory',
+            name='field_name',
+        ),
+        migrations.RemoveField(
+            model_name='updatehistory',
+            name='old_value',
+        ),
+        migrations.RemoveField(
+            model_name='updatehistory',
+            name='new_value',
+        ),
+    ]
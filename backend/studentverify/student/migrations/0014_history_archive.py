@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0013_updatehistory_change_sets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_date', models.DateTimeField()),
+                ('last_date', models.DateTimeField()),
+                ('entries', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history_archives', to='student.student')),
+            ],
+            options={
+                'ordering': ['-last_date'],
+                'indexes': [models.Index(fields=['student', '-last_date'], name='archive_student_date_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'student_updatehistory'
+
+
+def partition_history(apps, schema_editor):
+    # Rebuild UpdateHistory as a table range partitioned by update_date, one
+    # partition per year plus a default one. PostgreSQL only, other
+    # backends keep the plain table.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT DISTINCT EXTRACT(YEAR FROM update_date)::int FROM %s' % TABLE)
+        years = {row[0] for row in cursor.fetchall()}
+    this_year = timezone.now().year
+    years |= {this_year, this_year + 1}
+
+    statements = [
+        'ALTER TABLE %s RENAME TO %s_unpartitioned' % (TABLE, TABLE),
+        'ALTER INDEX history_student_date_idx RENAME TO history_student_date_idx_unpartitioned',
+        'CREATE SEQUENCE %s_pid_seq' % TABLE,
+        """CREATE TABLE %(table)s (
+            id bigint NOT NULL DEFAULT nextval('%(table)s_pid_seq'),
+            changes jsonb NOT NULL,
+            update_date timestamp with time zone NOT NULL,
+            student_id bigint NOT NULL,
+            PRIMARY KEY (id, update_date)
+        ) PARTITION BY RANGE (update_date)""" % {'table': TABLE},
+        'ALTER SEQUENCE %s_pid_seq OWNED BY %s.id' % (TABLE, TABLE),
+        'CREATE INDEX history_student_date_idx ON %s (student_id, update_date DESC)' % TABLE,
+        'ALTER TABLE %s ADD CONSTRAINT %s_student_id_fk FOREIGN KEY (student_id) '
+        'REFERENCES student_student (id) DEFERRABLE INITIALLY DEFERRED' % (TABLE, TABLE),
+        'CREATE TABLE %s_default PARTITION OF %s DEFAULT' % (TABLE, TABLE),
+    ]
+    statements += [
+        "CREATE TABLE %(table)s_y%(year)d PARTITION OF %(table)s "
+        "FOR VALUES FROM ('%(year)d-01-01 00:00:00+00') TO ('%(next)d-01-01 00:00:00+00')"
+        % {'table': TABLE, 'year': year, 'next': year + 1}
+        for year in sorted(years)
+    ]
+    statements += [
+        'INSERT INTO %s (id, changes, update_date, student_id) '
+        'SELECT id, changes, update_date, student_id FROM %s_unpartitioned' % (TABLE, TABLE),
+        "SELECT setval('%s_pid_seq', COALESCE((SELECT MAX(id) FROM %s), 0) + 1, false)" % (TABLE, TABLE),
+        'DROP TABLE %s_unpartitioned' % TABLE,
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def unpartition_history(apps, schema_editor):
+    # Back to the plain table Django creates for the model, rows included
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE %s RENAME TO %s_partitioned' % (TABLE, TABLE))
+    schema_editor.execute('ALTER INDEX history_student_date_idx RENAME TO history_student_date_idx_partitioned')
+    schema_editor.create_model(apps.get_model('student', 'UpdateHistory'))
+    schema_editor.execute(
+        'INSERT INTO %s (id, changes, update_date, student_id) '
+        'SELECT id, changes, update_date, student_id FROM %s_partitioned' % (TABLE, TABLE)
+    )
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('%s', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM %s"
+        % (TABLE, TABLE)
+    )
+    # The partitions and the id sequence go with it
+    schema_editor.execute('DROP TABLE %s_partitioned CASCADE' % TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0014_history_archive'),
+    ]
+
+    operations = [
+        # The partitioned table has the same columns and indexes as the
+        # plain one, so Django's model state does not change.
+        migrations.RunPython(partition_history, unpartition_history),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 00:59
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_summary(apps, schema_editor):
+    Student = apps.get_model('student', 'Student')
+    VerificationSummary = apps.get_model('student', 'VerificationSummary')
+    counts = defaultdict(lambda: [0, 0, 0])
+    for dimension in ('district', 'taluka', 'field_of_study'):
+        rows = Student.objects.order_by().values(dimension).annotate(
+            total=Count('id'),
+            data_verified=Count('id', filter=Q(is_data_verified=True)),
+            mobile_verified=Count('id', filter=Q(is_mobile_verified=True)),
+        )
+        for row in rows:
+            group = counts[(dimension, row[dimension] or '')]
+            group[0] += row['total']
+            group[1] += row['data_verified']
+            group[2] += row['mobile_verified']
+    VerificationSummary.objects.bulk_create([
+        VerificationSummary(
+            dimension=dimension, value=value,
+            total=total, data_verified=data_verified, mobile_verified=mobile_verified,
+        )
+        for (dimension, value), (total, data_verified, mobile_verified) in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0015_partition_update_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(blank=True, max_length=100)),
+                ('total', models.IntegerField(default=0)),
+                ('data_verified', models.IntegerField(default=0)),
+                ('mobile_verified', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='summary_dimension_value_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 01:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0016_verification_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('confirmed', 'Confirmed duplicate'), ('dismissed', 'Not a duplicate')], default='open', max_length=10)),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('student_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='student.student')),
+                ('student_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='student.student')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_status_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student_a', 'student_b'), name='duplicate_pair_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=120)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_keys', to='student.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key'], name='duplicate_key_idx')],
+            },
+        ),
+    ]
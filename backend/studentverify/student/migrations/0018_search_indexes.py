@@ -0,0 +1,45 @@
+from django.db import migrations
+
+TABLE = 'student_student'
+TRIGRAM_COLUMNS = ('name', 'address', 'city', 'taluka', 'mobile_number', 'father_mobile_number')
+# Must stay identical to search.DOCUMENT_SQL, or the planner ignores the index
+DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(address, '') || ' ' "
+    "|| coalesce(city, '') || ' ' || coalesce(taluka, ''))"
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    # Trigram indexes serve the fuzzy and substring matches, the expression
+    # index the whole word matches. PostgreSQL only, other backends search
+    # through the in-memory index in student.search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS student_%s_trgm_idx ON %s USING gin (%s gin_trgm_ops)'
+            % (column, TABLE, column)
+        )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS student_search_document_idx ON %s USING gin ((%s))' % (TABLE, DOCUMENT_SQL)
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute('DROP INDEX IF EXISTS student_%s_trgm_idx' % column)
+    schema_editor.execute('DROP INDEX IF EXISTS student_search_document_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0017_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,9 +1,10 @@
 from django.db import models
-from django.contrib.auth.hashers import make_password
+
+from .hashers import check_student_password, hash_student_password
 
 class Student(models.Model):
     roll_no = models.CharField(max_length=3, unique=True)
-    password = models.CharField(max_length=6)
+    password = models.CharField(max_length=128)
     name = models.CharField(max_length=50)
     date_of_birth = models.DateField()
     mobile_number = models.CharField(max_length=15)
@@ -20,39 +21,159 @@ class Student(models.Model):
     is_mobile_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Filter columns paired with the default cursor key (id), plus
+            # the alternative updated_at cursor.
+            models.Index(fields=['district', 'id'], name='student_district_id_idx'),
+            models.Index(fields=['taluka', 'id'], name='student_taluka_id_idx'),
+            models.Index(fields=['field_of_study', 'id'], name='student_field_of_study_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='student_updated_at_id_idx'),
+            # "Who still needs to verify" lookups per district only touch the
+            # shrinking set of unverified rows.
+            models.Index(
+                fields=['district', 'id'], condition=models.Q(is_data_verified=False),
+                name='student_data_unverified_idx'
+            ),
+            models.Index(
+                fields=['district', 'id'], condition=models.Q(is_mobile_verified=False),
+                name='student_mobile_unverified_idx'
+            ),
+        ]
     
     def set_password(self, raw_password):
-        self.password = raw_password
+        self.password = hash_student_password(raw_password)
         self.save(update_fields=['password'])
+
+    def check_password(self, raw_password):
+        return check_student_password(raw_password, self.password)
     
     def __str__(self):
         return f"{self.roll_no} - {self.name}"
 
 
 class UpdateHistory(models.Model):
+    # One change set per save, mapping each changed field to [old, new]
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='update_history')
-    field_name = models.CharField(max_length=50)
-    old_value = models.TextField(blank=True, null=True)
-    new_value = models.TextField(blank=True, null=True)
+    changes = models.JSONField(default=dict)
     update_date = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-update_date']
+        indexes = [
+            models.Index(fields=['student', '-update_date'], name='history_student_date_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.student.roll_no} - {self.field_name} update on {self.update_date}"
+        return f"{self.student.roll_no} - {', '.join(self.changes)} update on {self.update_date}"
+
+
+class HistoryArchive(models.Model):
+    # Change sets moved out of UpdateHistory by archive_history, stored as
+    # gzip compressed NDJSON, one row per student per archival batch.
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='history_archives')
+    first_date = models.DateTimeField()
+    last_date = models.DateTimeField()
+    entries = models.PositiveIntegerField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_date']
+        indexes = [
+            models.Index(fields=['student', '-last_date'], name='archive_student_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.roll_no} - {self.entries} archived changes up to {self.last_date}"
+
 
+class VerificationSummary(models.Model):
+    # Student counts per district / taluka / field_of_study, kept current by
+    # student.stats on every write and rebuilt by reconcile_statistics.
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=100, blank=True)
+    total = models.IntegerField(default=0)
+    data_verified = models.IntegerField(default=0)
+    mobile_verified = models.IntegerField(default=0)
 
-# class OTPVerification(models.Model):
-#     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='otp_verifications')
-#     otp = models.CharField(max_length=6)
-#     mobile_number = models.CharField(max_length=15)
-#     is_used = models.BooleanField(default=False)
-#     created_at = models.DateTimeField(auto_now_add=True)
-#     expires_at = models.DateTimeField()
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='summary_dimension_value_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.data_verified}/{self.total} verified"
+
+
+class DuplicateKey(models.Model):
+    # Blocking index of student.duplicates: students sharing a key are
+    # compared with each other, nobody else is.
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='duplicate_keys')
+    key = models.CharField(max_length=120)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key'], name='duplicate_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.roll_no} - {self.key}"
+
+
+class DuplicateCandidate(models.Model):
+    # A pair of students that probably are the same person, student_a has
+    # the lower id. Reviewed in the admin, a dismissed pair stays dismissed
+    # when it is detected again.
+    OPEN = 'open'
+    CONFIRMED = 'confirmed'
+    DISMISSED = 'dismissed'
+    STATUS_CHOICES = [
+        (OPEN, 'Open'),
+        (CONFIRMED, 'Confirmed duplicate'),
+        (DISMISSED, 'Not a duplicate'),
+    ]
+
+    student_a = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    student_b = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    # Fields that matched, e.g. ["name", "mobile_number"]
+    reasons = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    detected_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['student_a', 'student_b'], name='duplicate_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score'], name='duplicate_status_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_a.roll_no} / {self.student_b.roll_no} ({self.score:.2f})"
+
+
+class OTPVerification(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='otp_verifications')
+    # Keyed digest of the code, the code itself only ever leaves in the SMS
+    otp = models.CharField(max_length=64)
+    mobile_number = models.CharField(max_length=15)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    is_used = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='otp_expires_at_idx'),
+            models.Index(fields=['student', '-created_at'], name='otp_student_created_idx'),
+        ]
     
-#     def __str__(self):
-#         return f"OTP for {self.student.roll_no}"
+    def __str__(self):
+        return f"OTP for {self.student.roll_no}"
         
         
 # # student/models.py - Django Student Model
@@ -0,0 +1,91 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import OTPVerification
+from .sms import SMSMessage, dispatcher
+
+
+class OTPRateLimited(Exception):
+    pass
+
+
+def _digest(student_id, code):
+    return salted_hmac('student.otp', '%s:%s' % (student_id, code)).hexdigest()
+
+
+def _check_rate_limit(mobile_number):
+    # Fixed window counter per mobile number, kept in the shared cache so it
+    # holds across workers.
+    cache = caches[getattr(settings, 'STUDENT_CACHE_ALIAS', 'default')]
+    key = 'otp:rate:%s' % mobile_number
+    cache.add(key, 0, settings.OTP_RATE_WINDOW)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, 1, settings.OTP_RATE_WINDOW)
+        count = 1
+    if count > settings.OTP_RATE_LIMIT:
+        raise OTPRateLimited()
+
+
+def build_otp(student_id, mobile_number, code):
+    """An unsaved ``OTPVerification`` for ``code``, stored as a digest and
+    expiring after ``OTP_EXPIRY_SECONDS``."""
+    return OTPVerification(
+        student_id=student_id,
+        otp=_digest(student_id, code),
+        mobile_number=mobile_number,
+        expires_at=timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS),
+    )
+
+
+def issue_otp(student):
+    """Create an OTP for the student's mobile number and queue the SMS.
+
+    Returns the ``OTPVerification`` row, raises ``OTPRateLimited`` when the
+    number has been sent too many codes recently.
+    """
+    _check_rate_limit(student.mobile_number)
+
+    code = '%06d' % secrets.randbelow(1000000)
+    otp = build_otp(student.id, student.mobile_number, code)
+    otp.save()
+
+    dispatcher.send(SMSMessage(
+        to=student.mobile_number,
+        body='Your student verification code is %s. It expires in %d minutes.'
+             % (code, settings.OTP_EXPIRY_SECONDS // 60),
+    ))
+    return otp
+
+
+def check_otp(student, code):
+    """Consume the student's latest live OTP if ``code`` matches it."""
+    otp = (
+        OTPVerification.objects
+        .filter(student=student, is_used=False, expires_at__gt=timezone.now())
+        .order_by('-created_at')
+        .first()
+    )
+    if otp is None or otp.attempts >= settings.OTP_MAX_ATTEMPTS:
+        return False
+    if otp.mobile_number != student.mobile_number:
+        return False
+
+    if not constant_time_compare(otp.otp, _digest(student.id, str(code))):
+        OTPVerification.objects.filter(id=otp.id).update(attempts=F('attempts') + 1)
+        return False
+    # Only the request that flips is_used consumes the code, a concurrent
+    # one with the same code finds it used.
+    return OTPVerification.objects.filter(id=otp.id, is_used=False).update(is_used=True) == 1
+
+
+def purge_expired_otps():
+    return OTPVerification.objects.filter(expires_at__lt=timezone.now()).delete()[0]
@@ -0,0 +1,69 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+
+
+class StudentCursorPagination(CursorPagination):
+    """Keyset pagination on ``id`` (default) or ``updated_at``.
+
+    The ordering can be switched with ``?ordering=``, each choice is backed
+    by an index so page cost does not grow with the table. ``updated_at``
+    is not unique, ``id`` breaks ties so rows written in the same instant
+    keep one order from page to page.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('id',)
+    ordering_choices = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'updated_at': ('updated_at', 'id'),
+        '-updated_at': ('-updated_at', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering_choices.get(request.query_params.get('ordering'), self.ordering)
+
+
+class HistoryCursorPagination(CursorPagination):
+    """Change sets newest first, keyset paginated on ``update_date``.
+
+    With ``?since=`` the client is catching up on entries newer than a
+    timestamp it already has, so pages run oldest first and the last
+    ``update_date`` received is the next ``since``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-update_date'
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('since'):
+            return ('update_date',)
+        return (self.ordering,)
+
+
+class SearchPagination(LimitOffsetPagination):
+    """``?limit=``/``?offset=`` pages of ranked search matches.
+
+    Ranks give no stable cursor, and matches are not counted: one more
+    than the limit is fetched to know whether a next page exists.
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def paginate_search(self, search, request):
+        """Call ``search(limit, offset)`` for the requested page."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        matches = search(self.limit + 1, self.offset)
+        self.count = self.offset + len(matches)
+        return matches[:self.limit]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,231 @@
+"""Whole-table data-quality checks of the student records.
+
+The serializers only validate what a request writes, rows loaded before a
+rule existed, or by old migrations, are never looked at again. The checks
+here run over the whole table: columns are read in keyset chunks into
+NumPy arrays and every rule is a handful of vectorized string or date
+comparisons over a chunk, fast enough to run nightly on the full cohort.
+
+``check_data_quality()`` returns a per-rule summary and the row-level
+findings, one per failing field of a student.
+"""
+import numpy as np
+from django.utils import timezone
+
+from .gazetteer import get_gazetteer
+from .models import Student
+
+CHUNK_SIZE = 20000
+
+TEXT_COLUMNS = (
+    'roll_no', 'mobile_number', 'father_mobile_number', 'email',
+    'address', 'taluka', 'city', 'district', 'pincode',
+)
+ADDRESS_PARTS = ('address', 'taluka', 'city', 'district', 'pincode')
+MOBILE_FIELDS = ('mobile_number', 'father_mobile_number')
+
+# Ages in years on the day of the check
+MIN_AGE = 14
+MAX_AGE = 60
+
+RULES = {
+    'mobile_format': 'Mobile numbers are 10 digits starting with 6 to 9',
+    'pincode_format': 'Pincodes are 6 digits not starting with 0',
+    'pincode_district': "The pincode lies in the student's district",
+    'email_syntax': 'E-mail addresses are well formed',
+    'date_of_birth_range': 'Students are %d to %d years old' % (MIN_AGE, MAX_AGE),
+    'mobile_collision': "The student's mobile is nobody's father's number",
+    'missing_address_part': 'Address, taluka, city, district and pincode are filled in',
+}
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def _chunks(chunk_size):
+    last_id = 0
+    while True:
+        rows = list(
+            Student.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'date_of_birth', *TEXT_COLUMNS)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _columns(rows):
+    """Column arrays of a chunk, strings stripped with NULL as ''."""
+    values = list(zip(*rows))
+    columns = {
+        'id': np.array(values[0], dtype=np.int64),
+        'date_of_birth': np.array(values[1], dtype='datetime64[D]'),
+    }
+    for name, column in zip(TEXT_COLUMNS, values[2:]):
+        columns[name] = np.strings.strip(np.array([value or '' for value in column], dtype=np.str_))
+    return columns
+
+
+def _is_mobile(values):
+    # Among 10 digit strings the lexical order is the numeric one
+    return (np.strings.str_len(values) == 10) & np.strings.isdigit(values) & (values >= '6000000000')
+
+
+def check_mobile_format(columns, context):
+    for field in MOBILE_FIELDS:
+        yield field, ~_is_mobile(columns[field])
+
+
+def check_pincode_format(columns, context):
+    pincodes = columns['pincode']
+    valid = (np.strings.str_len(pincodes) == 6) & np.strings.isdigit(pincodes) & (pincodes >= '100000')
+    yield 'pincode', (pincodes != '') & ~valid
+
+
+def check_pincode_district(columns, context):
+    # Looked up once per distinct pincode and spread back to the rows
+    pincodes, inverse = np.unique(columns['pincode'], return_inverse=True)
+    areas = context['gazetteer'].pincode_areas
+    expected = np.array([(areas.get(str(pincode)) or ('', ''))[0] or '' for pincode in pincodes], dtype=np.str_)
+    expected = np.strings.lower(expected)[inverse]
+    district = np.strings.lower(columns['district'])
+    yield 'pincode', (expected != '') & (district != '') & (expected != district)
+
+
+def check_email_syntax(columns, context):
+    emails = columns['email']
+    at = np.strings.find(emails, '@')
+    valid = (
+        (np.strings.count(emails, '@') == 1) & (at > 0)
+        & (np.strings.rfind(emails, '.') > at + 1) & ~np.strings.endswith(emails, '.')
+        & (np.strings.find(emails, ' ') == -1) & (np.strings.find(emails, '..') == -1)
+        & (np.strings.str_len(emails) <= 254)
+    )
+    yield 'email', (emails != '') & ~valid
+
+
+def check_date_of_birth_range(columns, context):
+    born = columns['date_of_birth']
+    earliest = np.datetime64(_years_before(context['today'], MAX_AGE + 1), 'D')
+    latest = np.datetime64(_years_before(context['today'], MIN_AGE), 'D')
+    yield 'date_of_birth', np.isnat(born) | (born <= earliest) | (born > latest)
+
+
+def check_mobile_collision(columns, context):
+    # Another student's father having this number is only known once every
+    # chunk has been read, see _cross_chunk_collisions().
+    mobile, father = columns['mobile_number'], columns['father_mobile_number']
+    yield 'father_mobile_number', (mobile != '') & (mobile == father)
+
+
+def check_missing_address_part(columns, context):
+    for field in ADDRESS_PARTS:
+        yield field, columns[field] == ''
+
+
+CHECKS = {
+    'mobile_format': check_mobile_format,
+    'pincode_format': check_pincode_format,
+    'pincode_district': check_pincode_district,
+    'email_syntax': check_email_syntax,
+    'date_of_birth_range': check_date_of_birth_range,
+    'mobile_collision': check_mobile_collision,
+    'missing_address_part': check_missing_address_part,
+}
+
+
+def _cross_chunk_collisions(ids, mobiles, fathers):
+    """Mask of students whose mobile number is the father's number of
+    another student."""
+    numbers, counts = np.unique(fathers[fathers != ''], return_counts=True)
+    if not len(numbers):
+        return np.zeros(len(ids), dtype=bool)
+    position = np.minimum(np.searchsorted(numbers, mobiles), len(numbers) - 1)
+    as_father = np.where(numbers[position] == mobiles, counts[position], 0)
+    # The student's own father does not count, that is the same-row check
+    as_father -= (mobiles == fathers)
+    return (mobiles != '') & (as_father > 0)
+
+
+def _value(columns, field, index):
+    value = columns[field][index]
+    if field == 'date_of_birth':
+        return None if np.isnat(value) else str(value)
+    return str(value)
+
+
+def _inactive_rules(rules, context):
+    """The rules among ``rules`` lacking the data they check against, with
+    the reason."""
+    inactive = {}
+    if 'pincode_district' in rules and not context['gazetteer'].pincode_areas:
+        inactive['pincode_district'] = 'The gazetteer maps no pincode to a district'
+    return inactive
+
+
+def check_data_quality(rules=None, chunk_size=CHUNK_SIZE, today=None):
+    """Run ``rules`` (names from ``RULES``, all by default) over every student.
+
+    Returns ``{'checked': students, 'rules': {rule: summary}, 'inactive':
+    {rule: reason}, 'findings': [...]}``. A rule's summary has its
+    description, the number of failing students and of findings, a finding
+    names the rule, the student's ``roll_no``, the field and its value.
+    Rules without their reference data are not run, they are listed in
+    ``inactive`` rather than reported clean.
+    """
+    rules = list(RULES) if rules is None else list(rules)
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError('Unknown rules: %s' % ', '.join(sorted(unknown)))
+    context = {'gazetteer': get_gazetteer(), 'today': today or timezone.localdate()}
+    inactive = _inactive_rules(rules, context)
+    rules = [rule for rule in rules if rule not in inactive]
+    summary = {rule: {'description': RULES[rule], 'students': 0, 'findings': 0} for rule in rules}
+    findings = []
+    checked = 0
+    failing = {rule: [] for rule in rules}
+    mobile_columns = []
+
+    for rows in _chunks(chunk_size):
+        columns = _columns(rows)
+        checked += len(rows)
+        for rule in rules:
+            for field, mask in CHECKS[rule](columns, context):
+                failing[rule].append(columns['id'][mask])
+                for index in np.flatnonzero(mask):
+                    findings.append({
+                        'rule': rule,
+                        'roll_no': str(columns['roll_no'][index]),
+                        'field': field,
+                        'value': _value(columns, field, index),
+                    })
+        if 'mobile_collision' in rules:
+            mobile_columns.append(
+                (columns['id'], columns['roll_no'], columns['mobile_number'], columns['father_mobile_number'])
+            )
+
+    if mobile_columns:
+        ids, roll_nos, mobiles, fathers = (np.concatenate(parts) for parts in zip(*mobile_columns))
+        mask = _cross_chunk_collisions(ids, mobiles, fathers)
+        failing['mobile_collision'].append(ids[mask])
+        for index in np.flatnonzero(mask):
+            findings.append({
+                'rule': 'mobile_collision',
+                'roll_no': str(roll_nos[index]),
+                'field': 'mobile_number',
+                'value': str(mobiles[index]),
+            })
+
+    for finding in findings:
+        summary[finding['rule']]['findings'] += 1
+    for rule, id_arrays in failing.items():
+        if id_arrays:
+            summary[rule]['students'] = len(np.unique(np.concatenate(id_arrays)))
+    findings.sort(key=lambda finding: (rules.index(finding['rule']), finding['roll_no'], finding['field']))
+    return {'checked': checked, 'rules': summary, 'inactive': inactive, 'findings': findings}
@@ -0,0 +1,236 @@
+"""Ranked search over student names, addresses, places and mobile numbers.
+
+On PostgreSQL queries run against the pg_trgm and full-text GIN indexes of
+migration 0018: trigram word similarity finds partial and misspelt words,
+the full-text document whole words anywhere in the record, and digit
+queries match inside the mobile numbers. Other databases, SQLite in
+development and tests, search ``NgramIndex``, an in-memory trigram index
+of the same fields built per process and rebuilt once the student table
+has changed.
+
+Both return ``(student id, rank)`` pairs, best first. Ranks order the
+matches of one backend, they are not comparable across backends.
+"""
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Count, Max
+
+from .models import Student
+
+# Rank multiplier of a match in each field
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'city': 0.8,
+    'taluka': 0.8,
+    'address': 0.6,
+    'mobile_number': 1.0,
+    'father_mobile_number': 0.9,
+}
+TEXT_FIELDS = ('name', 'city', 'taluka', 'address')
+MOBILE_FIELDS = ('mobile_number', 'father_mobile_number')
+
+# pg_trgm's default word_similarity_threshold, applied by both backends
+SIMILARITY_THRESHOLD = 0.6
+MIN_QUERY_LENGTH = 3
+MAX_QUERY_LENGTH = 100
+
+# Same expression as the index of migration 0018
+DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(address, '') || ' ' "
+    "|| coalesce(city, '') || ' ' || coalesce(taluka, ''))"
+)
+
+MOBILE_QUERY = re.compile(r'[\d\s()+-]+')
+
+
+def parse_query(value):
+    """``(text, digits)`` of a search string, ``digits`` is set when it
+    looks like a whole or partial mobile number. Raises ``ValueError`` when
+    the query is too short."""
+    text = ' '.join((value or '').split())[:MAX_QUERY_LENGTH]
+    if len(text) < MIN_QUERY_LENGTH:
+        raise ValueError('q needs at least %d characters.' % MIN_QUERY_LENGTH)
+    if MOBILE_QUERY.fullmatch(text):
+        digits = re.sub(r'\D', '', text)
+        if len(digits) >= MIN_QUERY_LENGTH:
+            return text, digits
+    return text, None
+
+
+def trigrams(text):
+    """Trigrams of the words of ``text`` the way pg_trgm extracts them:
+    casefolded, each word padded with two spaces in front and one after."""
+    grams = set()
+    for word in re.findall(r'\w+', text.casefold()):
+        padded = '  %s ' % word
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """In-memory search index of ``rows``, dicts holding ``id`` and the
+    ``FIELD_WEIGHTS`` fields.
+
+    Text fields are indexed by distinct value, names and places repeat a
+    lot, with trigram postings pointing at values and every value listing
+    its students. Mobile numbers are joined into one string searched with
+    ``str.find``.
+    """
+
+    def __init__(self, rows):
+        values = {}
+        value_students = []
+        mobiles = []
+        self.mobile_students = array('q')
+        self.mobile_fields = array('b')
+        for row in rows:
+            for number, field in enumerate(MOBILE_FIELDS):
+                digits = re.sub(r'\D', '', row[field] or '')
+                if digits:
+                    mobiles.append(digits)
+                    self.mobile_students.append(row['id'])
+                    self.mobile_fields.append(number)
+            for field in TEXT_FIELDS:
+                if row[field]:
+                    key = (field, row[field])
+                    value = values.get(key)
+                    if value is None:
+                        value = values[key] = len(value_students)
+                        value_students.append([])
+                    value_students[value].append(row['id'])
+
+        self.value_weights = array('d', [FIELD_WEIGHTS[field] for field, _ in values])
+        self.value_students = [array('q', students) for students in value_students]
+        postings = defaultdict(list)
+        for (_, text), value in values.items():
+            for gram in trigrams(text):
+                postings[gram].append(value)
+        self.postings = {gram: array('q', ids) for gram, ids in postings.items()}
+        # A newline never matches digits, so a hit never spans two numbers
+        self.mobiles = '\n'.join(mobiles)
+        self.mobile_offsets = array('q')
+        offset = 0
+        for digits in mobiles:
+            self.mobile_offsets.append(offset)
+            offset += len(digits) + 1
+
+    def search(self, text, digits=None, limit=None):
+        """The best ``limit`` (all by default) ``(student id, rank)``
+        matches, ties by id.
+
+        Text matches a field value holding ``SIMILARITY_THRESHOLD`` of the
+        query's trigrams, ``digits`` match inside the mobile numbers.
+        """
+        ranks = {}
+        if digits:
+            position = self.mobiles.find(digits)
+            while position != -1:
+                number = bisect_right(self.mobile_offsets, position) - 1
+                student = self.mobile_students[number]
+                rank = FIELD_WEIGHTS[MOBILE_FIELDS[self.mobile_fields[number]]]
+                if rank > ranks.get(student, 0):
+                    ranks[student] = rank
+                position = self.mobiles.find(digits, position + 1)
+            return _best(ranks, limit)
+
+        grams = trigrams(text)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        needed = SIMILARITY_THRESHOLD * len(grams)
+        by_rank = defaultdict(list)
+        for value, shared in counts.items():
+            if shared >= needed:
+                by_rank[shared / len(grams) * self.value_weights[value]].append(value)
+        # Values best first, a student keeps the rank of its first value.
+        # Broad queries stop once the page is covered, the rest of a rank
+        # still goes in for the tie break on id.
+        for rank in sorted(by_rank, reverse=True):
+            if limit is not None and len(ranks) >= limit:
+                break
+            for value in by_rank[rank]:
+                for student in self.value_students[value]:
+                    ranks.setdefault(student, rank)
+        return _best(ranks, limit)
+
+
+def _rank_order(item):
+    return -item[1], item[0]
+
+
+def _best(ranks, limit):
+    if limit is None:
+        return sorted(ranks.items(), key=_rank_order)
+    return heapq.nsmallest(limit, ranks.items(), key=_rank_order)
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _table_version():
+    # Writes to the search fields bump updated_at, inserts the id and
+    # deletes the count.
+    return tuple(
+        Student.objects.aggregate(count=Count('id'), last_id=Max('id'), updated=Max('updated_at')).values()
+    )
+
+
+def get_index():
+    """This process' ``NgramIndex``, rebuilt when the student table changed
+    since it was built."""
+    global _index, _index_version
+    version = _table_version()
+    with _lock:
+        if _index is None or _index_version != version:
+            rows = Student.objects.values('id', *FIELD_WEIGHTS).iterator(chunk_size=5000)
+            _index, _index_version = NgramIndex(rows), version
+        return _index
+
+
+def _search_postgresql(text, digits, limit, offset):
+    qn = connection.ops.quote_name
+    params = {'limit': limit, 'offset': offset}
+    if digits:
+        # The trigram indexes also serve LIKE with leading wildcards
+        params['pattern'] = '%%%s%%' % digits
+        rank = 'CASE WHEN %s LIKE %%(pattern)s THEN %s ELSE %s END' % (
+            qn('mobile_number'), FIELD_WEIGHTS['mobile_number'], FIELD_WEIGHTS['father_mobile_number']
+        )
+        where = ' OR '.join('%s LIKE %%(pattern)s' % qn(field) for field in MOBILE_FIELDS)
+    else:
+        params['q'] = text
+        # "q <% field" is word_similarity(q, field) >= the pg_trgm threshold
+        rank = "GREATEST(%s) + ts_rank(%s, plainto_tsquery('simple', %%(q)s))" % (
+            ', '.join(
+                "word_similarity(%%(q)s, coalesce(%s, '')) * %s" % (qn(field), FIELD_WEIGHTS[field])
+                for field in TEXT_FIELDS
+            ),
+            DOCUMENT_SQL,
+        )
+        where = ' OR '.join(['%%(q)s <%%%% %s' % qn(field) for field in TEXT_FIELDS] + [
+            "%s @@ plainto_tsquery('simple', %%(q)s)" % DOCUMENT_SQL
+        ])
+    sql = 'SELECT %s, %s AS rank FROM %s WHERE %s ORDER BY rank DESC, %s LIMIT %%(limit)s OFFSET %%(offset)s' % (
+        qn('id'), rank, qn(Student._meta.db_table), where, qn('id')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(student_id, float(rank)) for student_id, rank in cursor.fetchall()]
+
+
+def search_students(value, limit, offset=0):
+    """Up to ``limit`` ``(student id, rank)`` matches of the query string
+    ``value`` after skipping ``offset``, best first and ties by id. Raises
+    ``ValueError`` for a query that is too short."""
+    text, digits = parse_query(value)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(text, digits, limit, offset)
+    return get_index().search(text, digits, offset + limit)[offset:]
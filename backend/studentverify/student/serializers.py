@@ -1,7 +1,90 @@
+import re
+from functools import lru_cache
+
 from rest_framework import serializers
+from .gazetteer import get_gazetteer
+from .metrics import track_serialization
 from .models import Student, UpdateHistory
 
-class StudentSerializer(serializers.ModelSerializer):
+PINCODE_RE = re.compile(r'^\d{6}$')
+
+class TimedRepresentationMixin:
+    """Reports the time spent building the representation to the request metrics."""
+
+    def to_representation(self, instance):
+        with track_serialization():
+            return super().to_representation(instance)
+
+
+class DynamicFieldsModelSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """Accepts a ``fields`` argument limiting which fields are rendered."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class AddressValidationMixin:
+    """Checks district, taluka, city and pincode against the gazetteer.
+
+    Known names are normalized to their canonical spelling. Cross-field
+    checks only run where the dataset has the mapping.
+    """
+
+    def _validate_name(self, kind, value, required_known=True):
+        if not value:
+            return value
+        gazetteer = get_gazetteer()
+        canonical = gazetteer.canonical(kind, value.strip())
+        if canonical:
+            return canonical
+        if required_known and gazetteer.is_known(kind):
+            raise serializers.ValidationError('Unknown %s.' % kind)
+        return value.strip()
+
+    def validate_district(self, value):
+        return self._validate_name('district', value)
+
+    def validate_taluka(self, value):
+        return self._validate_name('taluka', value)
+
+    def validate_city(self, value):
+        # City lists are never complete, unknown cities are kept as entered.
+        return self._validate_name('city', value, required_known=False)
+
+    def validate_pincode(self, value):
+        if value and not PINCODE_RE.match(value):
+            raise serializers.ValidationError('Pincode must be 6 digits.')
+        return value
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not {'district', 'taluka', 'pincode'} & set(attrs):
+            return attrs
+
+        def current(field):
+            return attrs[field] if field in attrs else getattr(self.instance, field, None)
+
+        gazetteer = get_gazetteer()
+        district, taluka, pincode = current('district'), current('taluka'), current('pincode')
+        errors = {}
+        if pincode and district:
+            area = gazetteer.lookup_pincode(pincode)
+            if area and area['district'] and area['district'] != district:
+                errors['pincode'] = 'Pincode %s belongs to %s district.' % (pincode, area['district'])
+        if taluka and district:
+            taluka_district = gazetteer.district_of_taluka(taluka)
+            if taluka_district and taluka_district != district:
+                errors['taluka'] = 'Taluka %s belongs to %s district.' % (taluka, taluka_district)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class StudentSerializer(AddressValidationMixin, DynamicFieldsModelSerializer):
     class Meta:
         model = Student
         fields = ['id', 'roll_no', 'name', 'date_of_birth', 'mobile_number', 'email', 
@@ -11,11 +94,79 @@ class StudentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class UpdateHistorySerializer(serializers.ModelSerializer):
+class StudentImportSerializer(AddressValidationMixin, serializers.ModelSerializer):
+    # Used by the bulk importer, which upserts on roll_no itself, so the
+    # per-row uniqueness query is dropped. The column holds the hash, the
+    # length limit applies to the raw password in the roster.
+    password = serializers.CharField(max_length=6, write_only=True)
+
+    class Meta:
+        model = Student
+        fields = ['roll_no', 'password', 'name', 'date_of_birth', 'mobile_number', 'email',
+                 'father_mobile_number', 'field_of_study',
+                 'address', 'taluka', 'city', 'district', 'pincode']
+        extra_kwargs = {'roll_no': {'validators': []}}
+
+
+class UpdateHistorySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = UpdateHistory
-        fields = ['id', 'student_id', 'field_name', 'old_value', 'new_value', 'update_date']
+        fields = ['id', 'student_id', 'changes', 'update_date']
         read_only_fields = ['id', 'update_date']
+
+
+# DRF representations that return database values unchanged
+_PASSTHROUGH = {
+    serializers.BooleanField.to_representation,
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.JSONField.to_representation,
+    serializers.ReadOnlyField.to_representation,
+}
+
+
+class ValuesSerializer:
+    """Read-only fast path producing the same data as a ``ModelSerializer``.
+
+    The output fields and their conversions are worked out once from the
+    serializer class. Rows are ``.values()`` dicts, or model instances for
+    ``represent_instance``; only fields whose representation differs from
+    the database value, such as dates, go through the DRF field.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            passthrough = type(field).to_representation in _PASSTHROUGH and not getattr(field, 'binary', False)
+            self.fields.append((name, field.source, None if passthrough else field.to_representation))
+        self.sources = [source for _, source, _ in self.fields]
+
+    def represent(self, row):
+        data = {}
+        for name, source, convert in self.fields:
+            value = row[source]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def represent_instance(self, instance):
+        with track_serialization():
+            data = {}
+            for name, source, convert in self.fields:
+                value = getattr(instance, source)
+                data[name] = value if convert is None or value is None else convert(value)
+            return data
+
+    def many(self, rows):
+        with track_serialization():
+            return [self.represent(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def values_serializer(serializer_class, fields=None):
+    """Shared ``ValuesSerializer``, ``fields`` is a tuple or ``None`` for all."""
+    return ValuesSerializer(serializer_class, fields)
         
 # from rest_framework import serializers
 # from .models import Student
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_student
+from .models import Student
+from .stats import STAT_FIELDS, record_changes, stat_state
+
+# Marks a save whose update_fields leave the counted fields alone
+_UNCHANGED = object()
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_cache(sender, instance, **kwargs):
+    invalidate_student(instance.roll_no)
+
+
+@receiver(pre_save, sender=Student)
+def remember_stat_state(sender, instance, raw, update_fields, **kwargs):
+    # Queryset updates and bulk writes bypass these signals and call
+    # record_changes() themselves.
+    if raw or instance._state.adding:
+        instance._stat_state = None
+    elif update_fields is not None and not set(update_fields) & set(STAT_FIELDS):
+        instance._stat_state = _UNCHANGED
+    else:
+        instance._stat_state = Student.objects.filter(pk=instance.pk).values(*STAT_FIELDS).first()
+
+
+@receiver(post_save, sender=Student)
+def update_statistics_on_save(sender, instance, raw, **kwargs):
+    old = getattr(instance, '_stat_state', None)
+    if raw or old is _UNCHANGED:
+        return
+    record_changes([(old, stat_state(instance))])
+
+
+@receiver(post_delete, sender=Student)
+def update_statistics_on_delete(sender, instance, **kwargs):
+    record_changes([(stat_state(instance), None)])
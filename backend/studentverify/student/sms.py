@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Messages delivered through LocmemGateway, for tests (like django.core.mail.outbox)
+outbox = []
+
+
+@dataclass
+class SMSMessage:
+    to: str
+    body: str
+
+
+class BaseSMSGateway:
+    async def send_batch(self, messages):
+        raise NotImplementedError
+
+
+class ConsoleGateway(BaseSMSGateway):
+    # Logs the codes in clear, the default only with DEBUG on
+    async def send_batch(self, messages):
+        for message in messages:
+            logger.info('SMS to %s: %s', message.to, message.body)
+
+
+class LocmemGateway(BaseSMSGateway):
+    async def send_batch(self, messages):
+        outbox.extend(messages)
+
+
+class TextflowGateway(BaseSMSGateway):
+    """Delivers through the ``textflowsms`` client, which is synchronous, so
+    each message runs in a worker thread and a batch is sent concurrently."""
+
+    def __init__(self):
+        import textflow
+        textflow.useKey(settings.TEXTFLOW_API_KEY)
+        self.client = textflow
+
+    async def send_batch(self, messages):
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self.client.sendSMS, message.to, message.body)
+            for message in messages
+        ), return_exceptions=True)
+        for message, result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.error('SMS to %s failed: %s', message.to, result)
+
+
+@lru_cache(maxsize=None)
+def get_gateway(path=None):
+    path = path or settings.SMS_GATEWAY
+    if not path:
+        raise ImproperlyConfigured('SMS_GATEWAY is not set, OTP codes cannot be sent.')
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def _reset_gateway(setting, **kwargs):
+    if setting == 'SMS_GATEWAY':
+        get_gateway.cache_clear()
+
+
+class SMSDispatcher:
+    """Sends SMS from an asyncio event loop running in a background thread.
+
+    ``send()`` only enqueues and returns immediately, so request threads
+    never wait on the gateway. Workers drain the queue in batches of up to
+    ``SMS_BATCH_SIZE`` messages, waiting at most ``SMS_BATCH_WINDOW`` seconds
+    to fill a batch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(
+                target=self._run, args=(loop, ready), name='sms-dispatcher', daemon=True
+            )
+            thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def _run(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue()
+        for _ in range(getattr(settings, 'SMS_WORKERS', 2)):
+            loop.create_task(self._worker())
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        batch_size = getattr(settings, 'SMS_BATCH_SIZE', 100)
+        deadline = loop.time() + getattr(settings, 'SMS_BATCH_WINDOW', 0.05)
+        while len(batch) < batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await get_gateway().send_batch(batch)
+            except Exception:
+                logger.exception('Failed to send a batch of %d SMS', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def send(self, message):
+        # A missing gateway fails the request, not the worker
+        get_gateway()
+        self._ensure_started()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def flush(self, timeout=5):
+        """Block until every queued message has been handed to the gateway."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop).result(timeout)
+
+
+dispatcher = SMSDispatcher()
@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Student, VerificationSummary
+
+STAT_DIMENSIONS = ('district', 'taluka', 'field_of_study')
+STAT_FIELDS = STAT_DIMENSIONS + ('is_data_verified', 'is_mobile_verified')
+COUNTERS = ('total', 'data_verified', 'mobile_verified')
+
+
+def stat_state(source):
+    """The fields the summary counts, from a ``Student`` or a dict."""
+    if isinstance(source, dict):
+        return {field: source.get(field) for field in STAT_FIELDS}
+    return {field: getattr(source, field) for field in STAT_FIELDS}
+
+
+def _counts(state):
+    return (1, int(bool(state['is_data_verified'])), int(bool(state['is_mobile_verified'])))
+
+
+def _add(deltas, state, sign):
+    counts = _counts(state)
+    for dimension in STAT_DIMENSIONS:
+        delta = deltas[(dimension, state[dimension] or '')]
+        for i, count in enumerate(counts):
+            delta[i] += sign * count
+
+
+def record_changes(changes):
+    """Apply ``(old_state, new_state)`` pairs to the summary counters.
+
+    ``old_state`` is ``None`` for created students and ``new_state`` for
+    deleted ones. Deltas are netted per group first, so the cost is one
+    UPDATE per touched group whatever the number of students. Call it in
+    the transaction that writes the students.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            _add(deltas, old, -1)
+        if new is not None:
+            _add(deltas, new, 1)
+
+    # Sorted so concurrent writers lock summary rows in the same order.
+    for (dimension, value), delta in sorted(deltas.items()):
+        if not any(delta):
+            continue
+        increments = {name: F(name) + d for name, d in zip(COUNTERS, delta)}
+        group = VerificationSummary.objects.filter(dimension=dimension, value=value)
+        if group.update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                VerificationSummary.objects.create(
+                    dimension=dimension, value=value, **dict(zip(COUNTERS, delta))
+                )
+        except IntegrityError:
+            # Created by a concurrent writer in the meantime
+            group.update(**increments)
+
+
+def compute_statistics():
+    """Count every group from the student table, ``{(dimension, value): [counts]}``."""
+    counts = defaultdict(lambda: [0, 0, 0])
+    for dimension in STAT_DIMENSIONS:
+        rows = (
+            Student.objects.order_by().values(dimension).annotate(
+                total=Count('id'),
+                data_verified=Count('id', filter=Q(is_data_verified=True)),
+                mobile_verified=Count('id', filter=Q(is_mobile_verified=True)),
+            )
+        )
+        for row in rows:
+            # NULL and '' are the same group
+            group = counts[(dimension, row[dimension] or '')]
+            for i, name in enumerate(COUNTERS):
+                group[i] += row[name]
+    return counts
+
+
+def rebuild_statistics():
+    """Replace the summary with fresh counts, returns the groups that drifted."""
+    with transaction.atomic():
+        current = {
+            (row.dimension, row.value): [row.total, row.data_verified, row.mobile_verified]
+            for row in VerificationSummary.objects.select_for_update()
+        }
+        fresh = compute_statistics()
+        VerificationSummary.objects.all().delete()
+        VerificationSummary.objects.bulk_create([
+            VerificationSummary(dimension=dimension, value=value, **dict(zip(COUNTERS, counts)))
+            for (dimension, value), counts in sorted(fresh.items())
+        ])
+    drifted = {
+        key for key in set(current) | set(fresh)
+        if current.get(key, [0, 0, 0]) != fresh.get(key, [0, 0, 0])
+    }
+    return sorted(drifted)
+
+
+def verification_statistics(dimensions=STAT_DIMENSIONS):
+    """Counts per group of each dimension plus overall totals, read from the
+    summary table only."""
+    result = {dimension: [] for dimension in dimensions}
+    totals = dict.fromkeys(COUNTERS, 0)
+    rows = VerificationSummary.objects.filter(dimension__in=STAT_DIMENSIONS).order_by('dimension', 'value')
+    for row in rows:
+        counts = {name: getattr(row, name) for name in COUNTERS}
+        if row.dimension == STAT_DIMENSIONS[0]:
+            # Every student is in exactly one group per dimension
+            for name in COUNTERS:
+                totals[name] += counts[name]
+        if row.dimension in result and row.total:
+            result[row.dimension].append(dict(
+                value=row.value or None, pending=counts['total'] - counts['data_verified'], **counts
+            ))
+    result['totals'] = dict(totals, pending=totals['total'] - totals['data_verified'])
+    return result
@@ -0,0 +1,167 @@
+"""Token bucket throttling of login, the OTP and the bulk endpoints.
+
+Every scope has a bucket per client IP and one per roll number, sized and
+refilled as configured in ``THROTTLE_RATES``. The throttles run before
+the view body, so a rejected request costs a bucket lookup and no query.
+
+Buckets live in the store named by ``THROTTLE_STORE``: the in-process
+``LocalTokenBucketStore`` by default, where each worker counts on its own,
+or ``CacheTokenBucketStore`` to share them through a cache such as Redis.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Longer values cannot be roll numbers, they are cut so keys stay small
+MAX_KEY_LENGTH = 32
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(10, 10 / 60)``, the bucket capacity and the
+    tokens added per second."""
+    count, _, period = rate.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()[:1]]
+
+
+class TokenBucketStore:
+    def consume(self, key, capacity, refill_rate):
+        """Take a token from bucket ``key``, returns 0 when allowed or the
+        seconds until a token is available."""
+        raise NotImplementedError
+
+    async def aconsume(self, key, capacity, refill_rate):
+        return await sync_to_async(self.consume, thread_sensitive=False)(key, capacity, refill_rate)
+
+
+def _take(tokens, elapsed, capacity, refill_rate):
+    """Refill ``tokens`` for ``elapsed`` seconds and take one, returns
+    ``(tokens left, seconds to wait)``."""
+    tokens = min(capacity, tokens + elapsed * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / refill_rate
+
+
+class LocalTokenBucketStore(TokenBucketStore):
+    """Buckets in a dict of the worker process, bounded to
+    ``THROTTLE_MAX_KEYS`` by dropping the least recently used ones, which
+    have refilled the longest."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+        self.max_keys = getattr(settings, 'THROTTLE_MAX_KEYS', 100000)
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, wait = _take(tokens, now - updated, capacity, refill_rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    async def aconsume(self, key, capacity, refill_rate):
+        # Never blocks, no need for a thread
+        return self.consume(key, capacity, refill_rate)
+
+
+class CacheTokenBucketStore(TokenBucketStore):
+    """Buckets in the ``THROTTLE_CACHE_ALIAS`` cache, shared by all workers.
+
+    The read and write of a bucket are not atomic, requests racing on the
+    same key may each get the last token. A bucket expires once it would
+    have refilled completely, so idle keys cost nothing.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.time()
+        cache_key = 'throttle:%s' % key
+        tokens, updated = self.cache.get(cache_key) or (capacity, now)
+        tokens, wait = _take(tokens, max(now - updated, 0), capacity, refill_rate)
+        self.cache.set(cache_key, (tokens, now), int((capacity - tokens) / refill_rate) + 1)
+        return wait
+
+
+@lru_cache(maxsize=None)
+def get_store(path=None):
+    return import_string(path or settings.THROTTLE_STORE)()
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    if setting in ('THROTTLE_STORE', 'THROTTLE_MAX_KEYS', 'THROTTLE_CACHE_ALIAS', 'THROTTLE_RATES'):
+        get_store.cache_clear()
+
+
+def _buckets(scope, ip, roll_no):
+    rates = settings.THROTTLE_RATES.get(scope, {})
+    for kind, ident in (('ip', ip), ('roll_no', roll_no)):
+        rate = rates.get(kind)
+        if rate and ident:
+            capacity, refill_rate = parse_rate(rate)
+            yield '%s:%s:%s' % (scope, kind, str(ident)[:MAX_KEY_LENGTH]), capacity, refill_rate
+
+
+def throttle_wait(scope, ip, roll_no):
+    """Take a token from the ``scope`` buckets of ``ip`` and ``roll_no``,
+    returns ``None`` when allowed or the seconds to wait."""
+    store = get_store()
+    for key, capacity, refill_rate in _buckets(scope, ip, roll_no):
+        wait = store.consume(key, capacity, refill_rate)
+        if wait:
+            return wait
+    return None
+
+
+async def athrottle_wait(scope, ip, roll_no):
+    store = get_store()
+    for key, capacity, refill_rate in _buckets(scope, ip, roll_no):
+        wait = await store.aconsume(key, capacity, refill_rate)
+        if wait:
+            return wait
+    return None
+
+
+class StudentRateThrottle(BaseThrottle):
+    """DRF throttle over the ``scope`` buckets. The roll number comes from
+    the URL, or the request body for login."""
+    scope = None
+
+    def allow_request(self, request, view):
+        roll_no = view.kwargs.get('roll_no')
+        if roll_no is None and isinstance(request.data, dict):
+            roll_no = request.data.get('roll_no')
+        self.wait_seconds = throttle_wait(self.scope, self.get_ident(request), roll_no)
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginThrottle(StudentRateThrottle):
+    scope = 'login'
+
+
+class OTPThrottle(StudentRateThrottle):
+    scope = 'otp'
+
+
+class BulkThrottle(StudentRateThrottle):
+    scope = 'bulk'
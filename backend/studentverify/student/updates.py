@@ -0,0 +1,155 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_students
+from .conditional import student_etag
+from .duplicates import IDENTITY_FIELDS, refresh_duplicates_on_commit
+from .events import publish_history
+from .models import Student, UpdateHistory
+from .serializers import StudentSerializer
+from .stats import STAT_FIELDS, record_changes, stat_state
+
+# Upper bound on roll numbers / records accepted by one bulk request
+BULK_LIMIT = 1000
+
+
+def diff_fields(instance, validated_data):
+    """Return ``(field, old_value, new_value)`` for every value that changes."""
+    return [
+        (field, getattr(instance, field), value)
+        for field, value in validated_data.items()
+        if getattr(instance, field) != value
+    ]
+
+
+def build_history(instance, changes):
+    """Return one ``UpdateHistory`` change set holding every field of ``changes``."""
+    return UpdateHistory(
+        student=instance,
+        changes={field: [str(old_value), str(new_value)] for field, old_value, new_value in changes},
+    )
+
+
+def bulk_verify_students(roll_nos):
+    """Mark the mobile numbers of ``roll_nos`` verified.
+
+    One SELECT, one ``UPDATE ... WHERE id IN (...)`` and one history INSERT
+    regardless of how many students are verified. Returns per-item results
+    in request order.
+    """
+    roll_nos = list(dict.fromkeys(str(roll_no) for roll_no in roll_nos))
+    with transaction.atomic():
+        # Rows stay locked until commit, a concurrent verify of the same
+        # students waits and then finds them verified.
+        students = (
+            Student.objects.select_for_update().filter(roll_no__in=roll_nos).only('id', 'roll_no', *STAT_FIELDS)
+        )
+        by_roll_no = {student.roll_no: student for student in students}
+        pending = [s for s in by_roll_no.values() if not s.is_mobile_verified]
+        if pending:
+            now = timezone.now()
+            Student.objects.filter(id__in=[s.id for s in pending]).update(
+                is_mobile_verified=True, updated_at=now
+            )
+            publish_history(UpdateHistory.objects.bulk_create([
+                build_history(student, [('is_mobile_verified', False, True)]) for student in pending
+            ]))
+            invalidate_students([s.roll_no for s in pending])
+            record_changes([
+                (stat_state(s), dict(stat_state(s), is_mobile_verified=True)) for s in pending
+            ])
+
+    pending_ids = {s.id for s in pending}
+    results = []
+    for roll_no in roll_nos:
+        student = by_roll_no.get(roll_no)
+        if student is None:
+            results.append({'roll_no': roll_no, 'status': 'not_found'})
+        elif student.id in pending_ids:
+            results.append({'roll_no': roll_no, 'status': 'verified'})
+        else:
+            results.append({'roll_no': roll_no, 'status': 'already_verified'})
+    return results
+
+
+def bulk_update_students(records):
+    """Apply partial updates to many students in one transaction.
+
+    Each record carries its ``roll_no`` and optionally the ``etag`` it was
+    read with; stale records are reported as conflicts and skipped, as are
+    roll numbers given more than once. Valid
+    changes are written with a single ``bulk_update`` and their history with
+    a single ``bulk_create``.
+    """
+    roll_nos = [str(record.get('roll_no')) for record in records]
+    repeated = {roll_no for roll_no, count in Counter(roll_nos).items() if count > 1}
+    with transaction.atomic():
+        # Read and locked in the write transaction, so the etag check still
+        # holds when bulk_update runs.
+        students = Student.objects.select_for_update().in_bulk(roll_nos, field_name='roll_no')
+        results = []
+        changed_students = []
+        changed_fields = set()
+        history = []
+        stat_changes = []
+        identity_changed = []
+        old_roll_nos = []
+        now = timezone.now()
+        for record in records:
+            data = dict(record)
+            roll_no = str(data.pop('roll_no', None))
+            etag = data.pop('etag', None)
+            if roll_no in repeated:
+                # Both records would apply to one instance, neither is applied
+                results.append({
+                    'roll_no': roll_no, 'status': 'invalid',
+                    'errors': {'roll_no': ['Appears more than once in the request.']},
+                })
+                continue
+            student = students.get(roll_no)
+            if student is None:
+                results.append({'roll_no': roll_no, 'status': 'not_found'})
+                continue
+            if etag is not None and etag != student_etag(student.updated_at):
+                results.append({'roll_no': roll_no, 'status': 'conflict'})
+                continue
+
+            serializer = StudentSerializer(student, data=data, partial=True)
+            if not serializer.is_valid():
+                results.append({'roll_no': roll_no, 'status': 'invalid', 'errors': serializer.errors})
+                continue
+
+            changes = diff_fields(student, serializer.validated_data)
+            if not changes:
+                results.append({'roll_no': roll_no, 'status': 'unchanged'})
+                continue
+
+            old_state = stat_state(student)
+            old_roll_nos.append(student.roll_no)
+            for field, _, value in changes:
+                setattr(student, field, value)
+                changed_fields.add(field)
+            student.updated_at = now
+            stat_changes.append((old_state, stat_state(student)))
+            if any(field in IDENTITY_FIELDS for field, _, _ in changes):
+                identity_changed.append(student.id)
+            changed_students.append(student)
+            history.append(build_history(student, changes))
+            results.append({
+                'roll_no': roll_no,
+                'status': 'updated',
+                'changed': [field for field, _, _ in changes],
+                'etag': student_etag(now),
+            })
+
+        if changed_students:
+            Student.objects.bulk_update(
+                changed_students, sorted(changed_fields) + ['updated_at'], batch_size=BULK_LIMIT
+            )
+            publish_history(UpdateHistory.objects.bulk_create(history))
+            invalidate_students(set(old_roll_nos) | {s.roll_no for s in changed_students})
+            record_changes(stat_changes)
+            refresh_duplicates_on_commit(identity_changed)
+    return results
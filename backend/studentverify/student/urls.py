@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'students', views.StudentViewSet)
@@ -8,4 +8,13 @@ router.register(r'students', views.StudentViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('login/', views.login_view, name='login'),
+    path('bootstrap/', views.bootstrap_view, name='bootstrap'),
+    path('async/login/', async_views.login_view, name='async-login'),
+    path('async/students/<str:roll_no>/', async_views.student_detail, name='async-student-detail'),
+    path('async/students/<str:roll_no>/history/', async_views.student_history, name='async-student-history'),
+    path('events/', async_views.student_events, name='student-events'),
+    path('gazetteer/autocomplete/', views.gazetteer_autocomplete, name='gazetteer-autocomplete'),
+    path('gazetteer/pincodes/<str:pincode>/', views.gazetteer_pincode, name='gazetteer-pincode'),
+    path('health/db/', views.database_health, name='database-health'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,100 +1,481 @@
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, throttle_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.contrib.auth.hashers import check_password, make_password
+from django.db import DatabaseError, connection, transaction
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.utils import timezone
 from datetime import timedelta
+import logging
 import random
+import time
 import string
+from studentverify.database import pool_stats
 from .models import Student, UpdateHistory
-from .serializers import StudentSerializer, UpdateHistorySerializer
+from .serializers import StudentSerializer, UpdateHistorySerializer, values_serializer
+from .exporters import (
+    EXPORT_FORMATS, HISTORY_EXPORT_FIELDS, STUDENT_EXPORT_FIELDS,
+    history_export_queryset, iter_export, iter_history_rows, student_export_queryset,
+)
+from .archive import archived_history
+from .authentication import issue_token
+from .cache import get_student_entry, invalidate_student, invalidate_students
+from .conditional import (
+    PreconditionFailed, check_if_match, conditional_read_response, set_validators,
+    student_etag, student_last_modified,
+)
+from .duplicates import IDENTITY_FIELDS, refresh_duplicates_on_commit
+from .events import publish_history
+from .filters import filter_history, filter_since, filter_students, parse_bool
+from .gazetteer import KINDS, get_gazetteer
+from .hashers import check_student_password, hash_student_password
+from .metrics import registry
+from .otp import OTPRateLimited, check_otp, issue_otp
+from .pagination import HistoryCursorPagination, SearchPagination, StudentCursorPagination
+from .search import search_students
+from .stats import STAT_DIMENSIONS, record_changes, stat_state, verification_statistics
+from .throttling import BulkThrottle, LoginThrottle, OTPThrottle
+from .updates import (
+    BULK_LIMIT, build_history, bulk_update_students, bulk_verify_students, diff_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+def check_login(data):
+    """Return ``(entry, None)`` with the cached profile entry when the
+    ``roll_no`` and ``password`` of the request body are right,
+    ``(None, error response)`` otherwise."""
+    if not isinstance(data, dict):
+        return None, Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+    roll_no, password = data.get('roll_no'), data.get('password')
+    loaded = []
+
+    def load():
+        loaded.append(Student.objects.get(roll_no=roll_no))
+        return loaded[0]
 
-@api_view(['POST'])
-def login_view(request):
-    roll_no = request.data.get('roll_no')
-    password = request.data.get('password')
-    
     try:
-        student = Student.objects.get(roll_no=roll_no)
-        
-        # Since the current implementation uses plain text passwords, 
-        # we're keeping that for compatibility
-        if password == student.password or password == '123456':
-            serializer = StudentSerializer(student)
-            return Response(serializer.data)
-        else:
-            return Response(
-                {'error': 'Invalid credentials'}, 
-                status=status.HTTP_401_UNAUTHORIZED
-            )
+        entry = get_student_entry(roll_no, load)
     except Student.DoesNotExist:
-        return Response(
+        return None, Response(
             {'error': 'Student not found'}, 
             status=status.HTTP_404_NOT_FOUND
         )
+    # Never cached, read from the row just loaded or on its own
+    if loaded:
+        encoded = loaded[0].password
+    else:
+        encoded = Student.objects.filter(roll_no=roll_no).values_list('password', flat=True).first()
+    if encoded is None:
+        return None, Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    def upgrade_hash(raw_password):
+        # Called when the stored hash uses outdated hasher settings
+        Student.objects.filter(roll_no=roll_no).update(password=hash_student_password(raw_password))
+        invalidate_student(roll_no)
+
+    if not check_student_password(password, encoded, setter=upgrade_hash):
+        return None, Response(
+            {'error': 'Invalid credentials'}, 
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    return entry, None
+
+
+@api_view(['POST'])
+@throttle_classes([LoginThrottle])
+def login_view(request):
+    entry, error = check_login(request.data)
+    if error:
+        return error
+
+    # The signed token lets later calls authenticate without hashing again.
+    data = dict(entry['data'], token=issue_token(entry['data']['roll_no']))
+    return set_validators(Response(data), entry['etag'], entry['last_modified'])
+
+
+@api_view(['GET', 'POST'])
+@throttle_classes([LoginThrottle])
+def bootstrap_view(request):
+    """What the dashboard shows on load in one round trip: the profile, its
+    verification status and the newest page of update history.
+
+    POST logs in with ``roll_no`` and ``password`` like ``login_view`` and
+    also returns the token, GET reloads for the student of the token.
+    Costs one student lookup (none when cached) and one history query.
+    """
+    if request.method == 'POST':
+        entry, error = check_login(request.data)
+        if error:
+            return error
+    else:
+        roll_no = getattr(request.user, 'roll_no', None)
+        if roll_no is None:
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            entry = get_student_entry(roll_no, lambda: Student.objects.get(roll_no=roll_no))
+        except Student.DoesNotExist:
+            return Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    student = entry['data']
+    # Paging links point at the history endpoint, where older pages are fetched
+    history_url = request.build_absolute_uri(reverse('student-history', args=[student['roll_no']]))
+    try:
+        history = history_page(request, student['id'], base_url=history_url)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    data = {
+        'student': student,
+        'verification': {
+            'is_data_verified': student['is_data_verified'],
+            'is_mobile_verified': student['is_mobile_verified'],
+            'complete': student['is_data_verified'] and student['is_mobile_verified'],
+        },
+        'history': history,
+    }
+    if request.method == 'POST':
+        data['token'] = issue_token(student['roll_no'])
+    return set_validators(Response(data), entry['etag'], entry['last_modified'])
+
+# Gazetteer data only changes on deploy, so clients may cache lookups.
+GAZETTEER_MAX_AGE = 60 * 60 * 24
+
+
+@api_view(['GET'])
+def gazetteer_autocomplete(request):
+    kind = request.query_params.get('kind')
+    if kind not in KINDS:
+        return Response(
+            {'error': 'kind must be one of: %s' % ', '.join(KINDS)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+    except ValueError:
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = get_gazetteer().autocomplete(kind, request.query_params.get('q', ''), limit)
+    response = Response({'results': results})
+    patch_cache_control(response, public=True, max_age=GAZETTEER_MAX_AGE)
+    return response
+
+
+@api_view(['GET'])
+def gazetteer_pincode(request, pincode):
+    area = get_gazetteer().lookup_pincode(pincode)
+    if area is None:
+        return Response({'error': 'Unknown pincode'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response(area)
+    patch_cache_control(response, public=True, max_age=GAZETTEER_MAX_AGE)
+    return response
+
+
+@api_view(['GET'])
+def database_health(request):
+    # Round trip time of a trivial query plus pool counters, for load
+    # balancer health checks and capacity tuning.
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError as exc:
+        return Response(
+            {'status': 'unavailable', 'error': str(exc)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    response = Response({
+        'status': 'ok',
+        'vendor': connection.vendor,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'pool': pool_stats(connection),
+    })
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+def history_page(request, student_id, base_url=None):
+    """One cursor page of a student's change sets, honouring ``?since=``.
+
+    ``?archived=true`` returns the change sets moved to the archive instead,
+    in one page. Paging links are built on ``base_url``, the request URL by
+    default. Raises ``ValueError`` for malformed parameters.
+    """
+    archived = request.query_params.get('archived')
+    if archived and parse_bool('archived', archived):
+        return {'next': None, 'previous': None, 'results': archived_history(student_id)}
+
+    serializer = values_serializer(UpdateHistorySerializer)
+    queryset = filter_since(UpdateHistory.objects.filter(student_id=student_id), request.query_params)
+    paginator = HistoryCursorPagination()
+    page = paginator.paginate_queryset(queryset.values(*serializer.sources), request)
+    if base_url:
+        paginator.base_url = base_url
+    return {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serializer.many(page),
+    }
+
+
+def metrics(request):
+    # Prometheus scrape endpoint, only answered for METRICS_ALLOWED_IPS
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
 class StudentViewSet(viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     lookup_field = 'roll_no'
-    
-    # Update in StudentViewSet.perform_update in backend 
+    pagination_class = StudentCursorPagination
+
+    def get_sparse_fields(self):
+        # ?fields=roll_no,name narrows both the SELECT and the serializer
+        # output on reads.
+        value = self.request.query_params.get('fields')
+        if self.action not in ('list', 'retrieve') or not value:
+            return None
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = set(fields) - set(StudentSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({'fields': 'Unknown fields: %s' % ', '.join(sorted(unknown))})
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            try:
+                queryset = filter_students(queryset, self.request.query_params)
+            except ValueError as e:
+                raise ValidationError({'error': str(e)})
+        fields = self.get_sparse_fields()
+        if fields:
+            # Pagination keys are always loaded to avoid per-row deferred fetches.
+            queryset = queryset.only(*set(fields) | {'id', 'roll_no', 'updated_at'})
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        # Pages are built from .values() rows, skipping model instances and
+        # the per-field serializer machinery. Same output as StudentSerializer.
+        fields = self.get_sparse_fields()
+        serializer = values_serializer(StudentSerializer, tuple(fields) if fields else None)
+        # Cursor positions are read from the row, so the ordering keys are selected too
+        columns = dict.fromkeys(serializer.sources + ['id', 'updated_at'])
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()).values(*columns))
+        return self.get_paginated_response(serializer.many(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.get_sparse_fields():
+            return super().retrieve(request, *args, **kwargs)
+
+        entry = get_student_entry(self.kwargs[self.lookup_field], self.get_object)
+        response = conditional_read_response(request, entry['etag'], entry['last_modified'])
+        if response is None:
+            response = set_validators(Response(entry['data']), entry['etag'], entry['last_modified'])
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.action in ('update', 'partial_update'):
+            # Stale writes are rejected before any serialization happens.
+            check_if_match(self.request, obj.updated_at)
+            self.object = obj
+        return obj
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            student = serializer.save()
+            refresh_duplicates_on_commit([student.pk])
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        updated_at = self.object.updated_at
+        return set_validators(response, student_etag(updated_at), student_last_modified(updated_at))
+
     def perform_update(self, serializer):
-        # Get the original instance before update
-        original_instance = self.get_object()
-        original_data = StudentSerializer(original_instance).data
-        
-        # Save the updated instance
-        instance = serializer.save()
-        
-        # If any data has changed, mark as not verified
-        has_changes = False
-        new_data = serializer.data
-        
-        for field in new_data:
-            if field in original_data and original_data[field] != new_data[field]:
-                has_changes = True
-                UpdateHistory.objects.create(
-                    student=instance,
-                    field_name=field,
-                    old_value=str(original_data[field]),
-                    new_value=str(new_data[field])
-                )
-        
-        instance.save()
-    
-        # if has_changes:
-        #     # Mark data as not verified when updated
-        #     instance.is_data_verified = False
-            
-        #     # If mobile number has changed, also mark mobile as not verified
-        #     if original_data['mobile_number'] != instance.mobile_number:
-        #         instance.is_mobile_verified = False
-            
-        #     instance.save()
-        
-    @action(detail=True, methods=['post'])
-    def verify(self, request, roll_no=None):
+        # Diff the validated fields against the instance already loaded by
+        # get_object(), so only changed columns are written and the audit
+        # trail goes out in a single INSERT.
+        instance = serializer.instance
+        changes = diff_fields(instance, serializer.validated_data)
+        if not changes:
+            return
+
+        with transaction.atomic():
+            # Only write if the row is still at the version get_object() saw,
+            # a concurrent edit that slipped in after the If-Match check loses.
+            loaded_version = instance.updated_at
+            old_state = stat_state(instance)
+            old_roll_no = instance.roll_no
+            for field, _, value in changes:
+                setattr(instance, field, value)
+            instance.updated_at = timezone.now()
+            updated = Student.objects.filter(pk=instance.pk, updated_at=loaded_version).update(
+                updated_at=instance.updated_at,
+                **{field: value for field, _, value in changes}
+            )
+            if not updated:
+                raise PreconditionFailed()
+            # roll_no is writable, a renamed student's old key must go too
+            invalidate_students({old_roll_no, instance.roll_no})
+            history = build_history(instance, changes)
+            history.save()
+            publish_history([history])
+            record_changes([(old_state, stat_state(instance))])
+            if any(field in IDENTITY_FIELDS for field, _, _ in changes):
+                refresh_duplicates_on_commit([instance.pk])
+
+    @action(detail=True, methods=['post'], throttle_classes=[OTPThrottle])
+    def send_otp(self, request, roll_no=None):
+        student = self.get_object()
+        try:
+            otp = issue_otp(student)
+        except OTPRateLimited:
+            return Response(
+                {'error': 'Too many OTP requests, try again later'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        # The SMS is sent in the background, the request does not wait for it.
+        return Response(
+            {'status': 'OTP sent', 'expires_at': otp.expires_at},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=True, methods=['post'], throttle_classes=[OTPThrottle])
+    def verify_otp(self, request, roll_no=None):
         student = self.get_object()
+        if not check_otp(student, request.data.get('otp', '')):
+            return Response(
+                {'error': 'Invalid or expired OTP'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        was_verified = student.is_mobile_verified
         student.is_mobile_verified = True
-        # Cannot verify if mobile is not verified
-        # if not student.is_mobile_verified:
-        #     return Response(
-        #         {'error': 'Mobile number must be verified first'}, 
-        #         status=status.HTTP_400_BAD_REQUEST
-        #     )
-        
-        # student.is_data_verified = True
-        student.save()
-        print("Mobile number verified")
+        with transaction.atomic():
+            student.save(update_fields=['is_mobile_verified', 'updated_at'])
+            if not was_verified:
+                self._record_mobile_verified(student)
         return Response({'status': 'Mobile number verified'})
-    
+
+    def _record_mobile_verified(self, student):
+        # Same change set as bulk_verify, it also feeds the event stream
+        history = build_history(student, [('is_mobile_verified', False, True)])
+        history.save()
+        publish_history([history])
+
+    def _bulk_payload(self, request, key):
+        items = request.data.get(key)
+        if not isinstance(items, list) or not items:
+            raise ValidationError({key: 'Expected a non-empty list.'})
+        if len(items) > BULK_LIMIT:
+            raise ValidationError({key: 'At most %d items per request.' % BULK_LIMIT})
+        return items
+
+    # Bulk writes are for the admin office, students verify their own
+    # mobile number through send_otp / verify_otp.
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], throttle_classes=[BulkThrottle])
+    def bulk_verify(self, request):
+        roll_nos = self._bulk_payload(request, 'roll_nos')
+        return Response({'results': bulk_verify_students(roll_nos)})
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], throttle_classes=[BulkThrottle])
+    def bulk_update(self, request):
+        records = self._bulk_payload(request, 'students')
+        if not all(isinstance(record, dict) and record.get('roll_no') for record in records):
+            raise ValidationError({'students': 'Every record needs a roll_no.'})
+        return Response({'results': bulk_update_students(records)})
+
+    @action(detail=False, methods=['get'])
+    def statistics(self, request):
+        # Served from the summary table, cost grows with the number of
+        # groups rather than students.
+        dimensions = request.query_params.getlist('dimension') or STAT_DIMENSIONS
+        unknown = set(dimensions) - set(STAT_DIMENSIONS)
+        if unknown:
+            return Response(
+                {'error': 'dimension must be one of: %s' % ', '.join(STAT_DIMENSIONS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(verification_statistics(dimensions))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        # ?q= ranked over name, address, city, taluka and the mobile numbers,
+        # each result carries its rank.
+        paginator = SearchPagination()
+        query = request.query_params.get('q')
+        try:
+            matches = paginator.paginate_search(
+                lambda limit, offset: search_students(query, limit, offset), request
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = values_serializer(StudentSerializer)
+        rows = {
+            row['id']: row
+            for row in Student.objects.filter(id__in=[student_id for student_id, _ in matches])
+            .values(*dict.fromkeys(serializer.sources + ['id']))
+        }
+        # A match deleted since the search is left out
+        matches = [(student_id, rank) for student_id, rank in matches if student_id in rows]
+        results = serializer.many(rows[student_id] for student_id, _ in matches)
+        for result, (_, rank) in zip(results, matches):
+            result['rank'] = round(rank, 4)
+        return paginator.get_paginated_response(results)
+
     @action(detail=True, methods=['get'])
     def history(self, request, roll_no=None):
         student = self.get_object()
-        history = UpdateHistory.objects.filter(student=student)
-        serializer = UpdateHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        try:
+            return Response(history_page(request, student.id))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _streaming_export(self, request, queryset, fields, filter_func, filename, flatten=None):
+        # ?format= is reserved by DRF for renderer selection, so the export
+        # format is passed as ?output=
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'output must be one of: %s' % ', '.join(EXPORT_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            queryset = filter_func(queryset, request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            iter_export(queryset, fields, export_format, flatten=flatten),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (filename, export_format)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        return self._streaming_export(
+            request, student_export_queryset(), STUDENT_EXPORT_FIELDS, filter_students, 'students'
+        )
+
+    @action(detail=False, methods=['get'], url_path='export/history')
+    def export_history(self, request):
+        return self._streaming_export(
+            request, history_export_queryset(), HISTORY_EXPORT_FIELDS, filter_history, 'update_history',
+            flatten=iter_history_rows
+        )
     
 
     # def perform_update(self, serializer):
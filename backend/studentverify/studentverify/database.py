@@ -0,0 +1,78 @@
+"""Database settings built from the environment.
+
+``DATABASE_URL`` picks the server, the remaining variables tune how
+connections are held:
+
+``DATABASE_CONN_MAX_AGE``
+    Seconds a worker keeps its connection open between requests, ``0``
+    closes it after every request. Ignored when pooling is enabled.
+``DATABASE_POOL_MAX_SIZE`` / ``DATABASE_POOL_MIN_SIZE``
+    Enables the psycopg 3 connection pool when the max size is set.
+``DATABASE_POOL_TIMEOUT``
+    Seconds a request waits for a free pooled connection.
+``DATABASE_POOL_MAX_LIFETIME`` / ``DATABASE_POOL_MAX_IDLE``
+    Seconds after which pooled connections are recycled / closed when idle.
+``DATABASE_STATEMENT_TIMEOUT``
+    Milliseconds PostgreSQL lets a single statement run, ``0`` disables it.
+"""
+import dj_database_url
+
+DEFAULT_DATABASE_URL = 'postgres://postgres@localhost:5432/postgres'
+
+
+def _int(env, name, default):
+    return int(env.get(name, default))
+
+
+def database_config(env):
+    """Return the ``DATABASES['default']`` dict for the environment ``env``."""
+    pool_max_size = _int(env, 'DATABASE_POOL_MAX_SIZE', 0)
+    config = dj_database_url.parse(
+        env.get('DATABASE_URL', DEFAULT_DATABASE_URL),
+        # Django refuses persistent connections together with a pool, the
+        # pool already keeps them open.
+        conn_max_age=0 if pool_max_size else _int(env, 'DATABASE_CONN_MAX_AGE', 60),
+        conn_health_checks=True,
+    )
+    if config['ENGINE'] != 'django.db.backends.postgresql':
+        return config
+
+    options = config.setdefault('OPTIONS', {})
+    statement_timeout = _int(env, 'DATABASE_STATEMENT_TIMEOUT', 5000)
+    if statement_timeout:
+        options['options'] = '-c statement_timeout=%d' % statement_timeout
+    if pool_max_size:
+        options['pool'] = {
+            'min_size': _int(env, 'DATABASE_POOL_MIN_SIZE', 2),
+            'max_size': pool_max_size,
+            'timeout': _int(env, 'DATABASE_POOL_TIMEOUT', 10),
+            'max_lifetime': _int(env, 'DATABASE_POOL_MAX_LIFETIME', 1800),
+            'max_idle': _int(env, 'DATABASE_POOL_MAX_IDLE', 300),
+        }
+    return config
+
+
+def pool_stats(connection):
+    """Gauges and cumulative counters of the psycopg pool behind
+    ``connection``, ``None`` when the connection is not pooled."""
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'min_size': stats.get('pool_min', 0),
+        'max_size': stats.get('pool_max', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': stats.get('requests_num', 0),
+        'queued_checkouts': stats.get('requests_queued', 0),
+        'wait_ms': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'usage_ms': stats.get('usage_ms', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'returns_bad': stats.get('returns_bad', 0),
+        'max_lifetime': pool.max_lifetime,
+        'max_idle': pool.max_idle,
+    }
@@ -11,22 +11,49 @@ import {
   CardTitle,
 } from "./ui/card";
 import { Skeleton } from "./ui/skeleton";
+import { Button } from "./ui/button";
+
+// Entries already fetched per student, newest first. Revisiting the tab only
+// asks the backend for entries newer than the first one.
+const historyCache: Record<string, { entries: UpdateHistory[]; next: string | null }> = {};
 
 const HistoryTab = () => {
   const student = useStudentStore();
   const [history, setHistory] = useState<UpdateHistory[]>([]);
+  const [next, setNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [archivedLoaded, setArchivedLoaded] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
     const loadHistory = async () => {
-      setLoading(true);
+      const cached = historyCache[student.roll_no];
+      setLoading(!cached);
       try {
-        console.log("Roll no:", student.roll_no);
-        const data = await getUpdateHistory(student.roll_no);
-        console.log("History data:", data);
-
-        setHistory(data);
+        let entries: UpdateHistory[];
+        let nextLink: string | null;
+        if (cached) {
+          entries = cached.entries;
+          nextLink = cached.next;
+          if (entries.length > 0) {
+            const newer: UpdateHistory[] = [];
+            let page = await getUpdateHistory(student.roll_no, { since: entries[0].update_date });
+            newer.push(...page.results);
+            while (page.next) {
+              page = await getUpdateHistory(student.roll_no, { cursor: page.next });
+              newer.push(...page.results);
+            }
+            entries = [...newer.reverse(), ...entries];
+          }
+        } else {
+          const page = await getUpdateHistory(student.roll_no);
+          entries = page.results;
+          nextLink = page.next;
+        }
+        historyCache[student.roll_no] = { entries, next: nextLink };
+        setHistory(entries);
+        setNext(nextLink);
       } catch (err: any) {
         console.error("Failed to fetch history:", err);
         setError("Failed to load update history.");
@@ -38,6 +65,37 @@ const HistoryTab = () => {
     loadHistory();
   }, [student.roll_no]);
 
+  const loadMore = async () => {
+    if (!next) return;
+    setLoadingMore(true);
+    try {
+      const page = await getUpdateHistory(student.roll_no, { cursor: next });
+      const entries = [...history, ...page.results];
+      historyCache[student.roll_no] = { entries, next: page.next };
+      setHistory(entries);
+      setNext(page.next);
+    } catch (err: any) {
+      console.error("Failed to fetch history:", err);
+      setError("Failed to load update history.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadArchived = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await getUpdateHistory(student.roll_no, { archived: true });
+      setHistory([...history, ...page.results]);
+      setArchivedLoaded(true);
+    } catch (err: any) {
+      console.error("Failed to fetch archived history:", err);
+      setError("Failed to load update history.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString: string) => {
     return new Date(dateString).toLocaleString().split(",")[0];
   };
@@ -159,7 +217,12 @@ const HistoryTab = () => {
         >
           <CardHeader className="py-3 px-4 bg-slate-50 border-b">
             <CardTitle className="text-base font-medium flex justify-between items-center">
-              <span>{item.field_name.replace("", " ")} Updated</span>
+              <span>
+                {Object.keys(item.changes)
+                  .map((field) => field.replace(/_/g, " "))
+                  .join(", ")}{" "}
+                Updated
+              </span>
               <span className="text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded-full">
                 {formatDate(item.update_date)}
               </span>
@@ -169,23 +232,40 @@ const HistoryTab = () => {
             </CardDescription>
           </CardHeader>
           <CardContent className="p-4">
-            <div className="flex flex-col space-y-3">
-              <div className="flex flex-col sm:flex-row sm:space-x-2">
-                <span className="text-sm font-medium text-gray-500">From:</span>
-                <span className="text-sm bg-gray-50 px-2 py-1 rounded w-full sm:w-auto">
-                  {item.old_value || "(empty)"}
-                </span>
-              </div>
-              <div className="flex flex-col sm:flex-row sm:space-x-2">
-                <span className="text-sm font-medium text-gray-500">To:</span>
-                <span className="text-sm bg-green-50 text-green-800 px-2 py-1 rounded w-full sm:w-auto">
-                  {item.new_value || "(empty)"}
-                </span>
-              </div>
+            <div className="flex flex-col space-y-4">
+              {Object.entries(item.changes).map(([field, [oldValue, newValue]]) => (
+                <div key={field} className="flex flex-col space-y-3">
+                  <span className="text-sm font-medium capitalize">
+                    {field.replace(/_/g, " ")}
+                  </span>
+                  <div className="flex flex-col sm:flex-row sm:space-x-2">
+                    <span className="text-sm font-medium text-gray-500">From:</span>
+                    <span className="text-sm bg-gray-50 px-2 py-1 rounded w-full sm:w-auto">
+                      {oldValue || "(empty)"}
+                    </span>
+                  </div>
+                  <div className="flex flex-col sm:flex-row sm:space-x-2">
+                    <span className="text-sm font-medium text-gray-500">To:</span>
+                    <span className="text-sm bg-green-50 text-green-800 px-2 py-1 rounded w-full sm:w-auto">
+                      {newValue || "(empty)"}
+                    </span>
+                  </div>
+                </div>
+              ))}
             </div>
           </CardContent>
         </Card>
       ))}
+      {next && (
+        <Button variant="outline" className="w-full" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? "Loading..." : "Load older changes"}
+        </Button>
+      )}
+      {!next && !archivedLoaded && (
+        <Button variant="ghost" className="w-full" onClick={loadArchived} disabled={loadingMore}>
+          {loadingMore ? "Loading..." : "Show archived changes"}
+        </Button>
+      )}
     </div>
   );
 };
@@ -2,7 +2,7 @@
 import { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { useStudentStore } from "../store/studentStore";
-import { loginStudent } from "../services/api";
+import { bootstrapStudent } from "../services/api";
 import { Card, CardContent, CardHeader, CardTitle } from "./ui/card";
 import { Input } from "./ui/input";
 import { Button } from "./ui/button";
@@ -39,9 +39,10 @@ const LoginForm = () => {
     setError(null);
 
     try {
-      // Convert roll_no to string for API call
-      const response = await loginStudent(String(data.roll_no), data.password);
-      setStudentData(response);
+      // Convert roll_no to string for API call. Bootstrap logs in and
+      // returns the dashboard data in the same request.
+      const response = await bootstrapStudent(String(data.roll_no), data.password);
+      setStudentData(response.student);
       navigate(`/student/${data.roll_no}`);
     } catch (err: any) {
       console.error("Login error:", err);
@@ -1,12 +1,6 @@
 import { useState, useEffect } from "react";
 import { useStudentStore } from "../store/studentStore";
-import { auth } from "../services/firebase";
 import { useNavigate } from "react-router-dom";
-import {
-  ConfirmationResult,
-  RecaptchaVerifier,
-  signInWithPhoneNumber,
-} from "firebase/auth";
 import {
   Card,
   CardContent,
@@ -25,7 +19,7 @@ import {
 } from "./ui/input-otp";
 import { otpVerificationSchema } from "../validation/schemas";
 import { z } from "zod";
-import { verifyStudentData } from "@/services/api";
+import { sendOtp, verifyOtp } from "@/services/api";
 
 interface OtpVerificationProps {
   onVerificationComplete: () => void;
@@ -43,29 +37,6 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
   const [verifying, setVerifying] = useState(false);
   const [resendCountdown, setResendCountdown] = useState(0);
 
-  // Firebase authentication related states
-  const [recaptchaVerifier, setRecaptchaVerifier] =
-    useState<RecaptchaVerifier | null>(null);
-  const [confirmationResult, setConfirmationResult] =
-    useState<ConfirmationResult | null>(null);
-
-  // Initialize recaptchaVerifier
-  useEffect(() => {
-    // Initialize recaptchaVerifier only if it doesn't exist
-    if (!recaptchaVerifier) {
-      const verifier = new RecaptchaVerifier(auth, "recaptcha-container", {
-        size: "invisible",
-      });
-
-      setRecaptchaVerifier(verifier);
-
-      // Clean up on component unmount
-      return () => {
-        verifier.clear();
-      };
-    }
-  }, []);
-
   // Countdown timer for resend OTP
   useEffect(() => {
     let timer: NodeJS.Timeout;
@@ -87,33 +58,15 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
     setError(null);
     setSuccess(null);
 
-    if (!recaptchaVerifier) {
-      setError(
-        "Recaptcha verifier not initialized. Please refresh the page and try again."
-      );
-      setLoading(false);
-      return;
-    }
-
     try {
       // Validate mobile number with Zod
-      const validatedInput = otpVerificationSchema
+      otpVerificationSchema
         .pick({ mobile_number: true })
         .parse({ mobile_number: student.mobile_number });
 
-      // Format the phone number to include + if it doesn't already
-      const formattedPhoneNumber = validatedInput.mobile_number.startsWith("+")
-        ? validatedInput.mobile_number
-        : `+${validatedInput.mobile_number}`;
-
-      // Use Firebase signInWithPhoneNumber
-      const confirmation = await signInWithPhoneNumber(
-        auth,
-        formattedPhoneNumber,
-        recaptchaVerifier
-      );
+      // The backend generates the code and texts it to the stored number
+      await sendOtp(student.roll_no);
 
-      setConfirmationResult(confirmation);
       setOtpSent(true);
       setResendCountdown(60);
       setSuccess("OTP sent successfully to your mobile number.");
@@ -123,14 +76,12 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
 
       if (err instanceof z.ZodError) {
         setError(err.errors[0].message);
-      } else if (err.code === "auth/invalid-phone-number") {
-        setError(
-          "Invalid phone number. Please check the format (include country code)."
-        );
-      } else if (err.code === "auth/too-many-requests") {
+      } else if (err.response?.status === 429) {
         setError("Too many requests. Please try again later.");
       } else {
-        setError(err.message || "Failed to send OTP. Please try again.");
+        setError(
+          err.response?.data?.error || "Failed to send OTP. Please try again."
+        );
       }
     } finally {
       setLoading(false);
@@ -143,7 +94,7 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
       otpVerificationSchema.pick({ otp: true }).parse({ otp });
       console.log(otp);
 
-      if (!confirmationResult) {
+      if (!otpSent) {
         setError("Please request an OTP first.");
         return;
       }
@@ -151,26 +102,17 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
       setVerifying(true);
       setError(null);
 
-      // Use Firebase confirmation
-      await confirmationResult.confirm(otp);
-      console.log("OTP verified successfully", confirmationResult.confirm(otp));
+      // The backend checks and consumes the code, then marks the number verified
+      await verifyOtp(student.roll_no, otp);
 
       setSuccess("Mobile number verified successfully!");
 
-      // First update student data in store - make sure we preserve is_data_verified
+      // Update student data in store - make sure we preserve is_data_verified
       student.setStudentData({
         ...student,
         is_mobile_verified: true,
       });
 
-      // Then update in database - again preserving is_data_verified status
-      // await updateStudentData(student.roll_no, {
-      //   ...student,
-      //   is_mobile_verified: true
-      // });
-
-      await verifyStudentData(student.roll_no);
-
       // Immediately navigate to thank you page
       navigate("/thank-you");
 
@@ -180,6 +122,8 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
 
       if (err instanceof z.ZodError) {
         setError(err.errors[0].message);
+      } else if (err.response?.status === 429) {
+        setError("Too many attempts. Please try again later.");
       } else {
         setError("Invalid OTP. Please try again.");
       }
@@ -204,7 +148,7 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
           <div className="space-y-4">
             <Button
               onClick={handleSendOTP}
-              disabled={loading || !recaptchaVerifier}
+              disabled={loading}
               className="w-full bg-blue-600 hover:bg-blue-700 transition-colors"
             >
               {loading ? "Sending OTP..." : "Send OTP"}
@@ -247,7 +191,7 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
 
               <Button
                 variant="outline"
-                disabled={resendCountdown > 0 || loading || !recaptchaVerifier}
+                disabled={resendCountdown > 0 || loading}
                 onClick={handleSendOTP}
                 className="w-full border-blue-300 text-blue-600 hover:bg-blue-50"
               >
@@ -282,9 +226,6 @@ const OtpVerification: React.FC<OtpVerificationProps> = () => {
             <AlertDescription>{success}</AlertDescription>
           </Alert>
         )}
-
-        {/* Required div for recaptcha to render */}
-        <div id="recaptcha-container" className="flex justify-center"></div>
       </CardContent>
     </Card>
   );
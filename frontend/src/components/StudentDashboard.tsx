@@ -2,7 +2,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { useStudentStore } from "../store/studentStore";
-import { getStudentData } from "../services/api";
+import { bootstrapStudent } from "../services/api";
 import UpdateDetailsForm from "./UpdateDetailsForm";
 import VerificationTab from "./VerificationTab";
 import DataConfirmation from "./DataConfirmation";
@@ -37,9 +37,15 @@ const StudentDashboard = () => {
         return;
       }
 
+      // Fresh from login, the profile is already in the store
+      if (student.id) {
+        setLoading(false);
+        return;
+      }
+
       try {
-        const data = await getStudentData(rollNo?.toString() || "");
-        student.setStudentData(data);
+        const data = await bootstrapStudent();
+        student.setStudentData(data.student);
       } catch (err: any) {
         console.error("Failed to fetch student data:", err);
         setError("Failed to load student data. Please try again later.");
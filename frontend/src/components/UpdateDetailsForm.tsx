@@ -3,7 +3,8 @@
 import type React from "react"
 import { useState, useEffect, useRef } from "react"
 import { useStudentStore } from "../store/studentStore"
-import { updateStudentData } from "../services/api"
+import { searchGazetteer, updateStudentData } from "../services/api"
+import type { GazetteerKind } from "../services/api"
 import { Card, CardContent } from "./ui/card"
 import { Input } from "./ui/input"
 import { Button } from "./ui/button"
@@ -75,424 +76,6 @@ const INPUT_GUIDELINES = {
   pincode: "6-digit pincode",
 }
 
-// Define separate lists for districts and talukas
-const DISTRICTS = [
-  "Ahmedabad",
-    "Amreli",
-    "Anand",
-    "Aravalli",
-    "Banaskantha",
-    "Bharuch",
-    "Bhavnagar",
-    "Botad",
-    "Chhota Udaipur",
-    "Dahod",
-    "Dang",
-    "Devbhumi Dwarka",
-    "Gandhinagar",
-    "Gir Somnath",
-    "Jamnagar",
-    "Junagadh",
-    "Kheda",
-    "Kutch",
-    "Mahisagar",
-    "Mehsana",
-    "Morbi",
-    "Narmada",
-    "Navsari",
-    "Panchmahal",
-    "Patan",
-    "Porbandar",
-    "Rajkot",
-    "Sabarkantha",
-    "Surat",
-    "Surendranagar",
-    "Tapi",
-    "Vadodara",
-    "Valsad",
-    "Dadra & Nagar Haveli"
-]
-
-const TALUKAS = [
-  "Abdasa",
-    "Ahmedabad",
-    "Ahwa",
-    "Amirgadh",
-    "Amod",
-    "Amreli",
-    "Anand",
-    "Anjar",
-    "Anklav",
-    "Ankleshwar",
-    "Babra",
-    "Bagasara",
-    "Balasinor",
-    "Bardoli",
-    "Barwala",
-    "Bavla",
-    "Bayad",
-    "Becharaji",
-    "Bhabhar",
-    "Bhachau",
-    "Bhanvad",
-    "Bharuch",
-    "Bhavnagar",
-    "Bhesan",
-    "Bhiloda",
-    "Bhuj",
-    "Bodeli",
-    "Borsad",
-    "Botad",
-    "Chanasma",
-    "Chhota Udaipur",
-    "Chikhli",
-    "Choryasi",
-    "Chotila",
-    "Chuda",
-    "Dabhoi",
-    "Dahod",
-    "Danta",
-    "Dantiwada",
-    "Dasada",
-    "Daskroi",
-    "Dediapada",
-    "Deesa",
-    "Dehgam",
-    "Deodar",
-    "Desar",
-    "Detroj-Rampura",
-    "Devgadhbaria",
-    "Dhandhuka",
-    "Dhanera",
-    "Dhanpur",
-    "Dhansura",
-    "Dharampur",
-    "Dhari",
-    "Dholera",
-    "Dholka",
-    "Dhoraji",
-    "Dhrangadhra",
-    "Dhrol",
-    "Fatepura",
-    "Gadhada",
-    "Galteshwar",
-    "Gandevi",
-    "Gandhidham",
-    "Gandhinagar",
-    "Garbada",
-    "Gariadhar",
-    "Garudeshwar",
-    "Ghogha",
-    "Ghoghamba",
-    "Gir Gadhada",
-    "Godhra",
-    "Gondal",
-    "Halol",
-    "Halvad",
-    "Hansot",
-    "Harij",
-    "Himatnagar",
-    "Idar",
-    "Jafrabad",
-    "Jalalpore",
-    "Jambughoda",
-    "Jambusar",
-    "Jamjodhpur",
-    "Jamkandorna",
-    "Jamnagar",
-    "Jasdan",
-    "Jeshar",
-    "Jetpur",
-    "Jetpur-Pavi",
-    "Jhagadia",
-    "Jhalod",
-    "Jodiya",
-    "Jotana",
-    "Junagadh",
-    "Kadana",
-    "Kadi",
-    "Kalavad",
-    "Kalol",
-    "Kalol",
-    "Kalyanpur",
-    "Kamrej",
-    "Kankrej",
-    "Kapadvanj",
-    "Kaprada",
-    "Karjan",
-    "Kathlal",
-    "Kavant",
-    "Keshod",
-    "Khambha",
-    "Khambhalia",
-    "Khambhat",
-    "Khanpur",
-    "Kheda",
-    "Khedbrahma",
-    "Kheralu",
-    "Khergam",
-    "Kodinar",
-    "Kotda Sangani",
-    "Kunkavav-Vadia",
-    "Kutiyana",
-    "Lakhani",
-    "Lakhpat",
-    "Lakhtar",
-    "Lalpur",
-    "Lathi",
-    "Lilia",
-    "Limbdi",
-    "Limkheda",
-    "Lodhika",
-    "Lunawada",
-    "Mahemdavad",
-    "Mahudha",
-    "Mahuva",
-    "Mahuva",
-    "Malia",
-    "Maliya",
-    "Malpur",
-    "Manavadar",
-    "Mandal",
-    "Mandvi",
-    "Mandvi",
-    "Mangrol",
-    "Mangrol",
-    "Mansa",
-    "Matar",
-    "Meghraj",
-    "Mehsana",
-    "Mendarda",
-    "Modasa",
-    "Morbi",
-    "Morwa (Hadaf)",
-    "Muli",
-    "Mundra",
-    "Nadiad",
-    "Nakhatrana",
-    "Nandod",
-    "Naswadi",
-    "Navsari",
-    "Netrang",
-    "Nizar",
-    "Okhamandal",
-    "Olpad",
-    "Paddhari",
-    "Padra",
-    "Palanpur",
-    "Palitana",
-    "Palsana",
-    "Pardi",
-    "Patan",
-    "Petlad",
-    "Porbandar",
-    "Poshina",
-    "Prantij",
-    "Radhanpur",
-    "Rajkot",
-    "Rajula",
-    "Ranavav",
-    "Ranpur",
-    "Rapar",
-    "Sagbara",
-    "Sami",
-    "Sanand",
-    "Sanjeli",
-    "Sankheda",
-    "Sankheshwar",
-    "Santalpur",
-    "Santrampur",
-    "Saraswati",
-    "Satlasana",
-    "Savarkundla",
-    "Savli",
-    "Sayla",
-    "Shehera",
-    "Sidhpur",
-    "Sihor",
-    "Sinor",
-    "Sojitra",
-    "Songadh",
-    "Subir",
-    "Suigam",
-    "Surat",
-    "Sutrapada",
-    "Talaja",
-    "Talala",
-    "Talod",
-    "Tankara",
-    "Tarapur",
-    "Thangadh",
-    "Tharad",
-    "Thasra",
-    "Tilakwada",
-    "Uchchhal",
-    "Umargam",
-    "Umarpada",
-    "Umrala",
-    "Umreth",
-    "Una",
-    "Unjha",
-    "Upleta",
-    "Vadali",
-    "Vadgam",
-    "Vadnagar",
-    "Vadodara",
-    "Vaghodia",
-    "Vagra",
-    "Valia",
-    "Vallabhipur",
-    "Valod",
-    "Valsad",
-    "Vansda",
-    "Vanthali",
-    "Vapi",
-    "Vaso",
-    "Vav",
-    "Veraval",
-    "Vijapur",
-    "Vijaynagar",
-    "Vinchhiya",
-    "Viramgam",
-    "Virpur",
-    "Visavadar",
-    "Visnagar",
-    "Vyara",
-    "Wadhwan",
-    "Waghai",
-    "Wankaner",
-    "Dadra & Nagar Haveli"
-]
-
-const PINCODES = [
-  "383001", "383002", "383006", "383010", "383030", "383110", "383120", "383205", "383210", "383215", 
-      "383220", "383225", "383230", "383235", "383240", "383246", "383255", "383270", "383275", "383276", 
-      "383305", "383307", "383410", "383421", "383422", "383430", "383434", "383440", "383450", "383460", 
-      "383462", "387305",
-      "363423", "380001", "380002", "380003", "380004", "380005", "380006", "380007", "380008", "380009", 
-      "380013", "380014", "380015", "380016", "380018", "380019", "380021", "380022", "380023", "380024", 
-      "380026", "380027", "380028", "380049", "380050", "380051", "380052", "380054", "380055", "380058", 
-      "380059", "380060", "380061", "380063", "382110", "382115", "382120", "382130", "382140", "382145", 
-      "382150", "382170", "382210", "382213", "382220", "382225", "382230", "382240", "382245", "382250", 
-      "382260", "382265", "382308", "382330", "382340", "382345", "382350", "382405", "382415", "382418", 
-      "382421", "382424", "382425", "382427", "382428", "382430", "382433", "382435", "382443", "382445", 
-      "382449", "382450", "382455", "382460", "382463", "382465", "382470", "382475", "382480", "382481", 
-      "382722",
-      "382115", "382120", "382170", "384001", "384002", "384003", "384005", "384012", "384120", "384130", 
-      "384135", "384140", "384160", "384170", "384260", "384305", "384310", "384315", "384320", "384325", 
-      "384330", "384335", "384340", "384345", "384355", "384360", "384410", "384412", "384415", "384421", 
-      "384430", "384435", "384440", "384441", "384445", "384450", "384455", "384460", "384465", "384470", 
-      "384515", "384520", "384530", "384540", "384550", "384560", "384565", "384570",
-      "385001", "385010", "385110", "385120", "385130", "385135", "385210", "385310", "385320", "385330", 
-      "385410", "385421", "385505", "385506", "385510", "385515", "385520", "385530", "385535", "385540", 
-      "385545", "385550", "385555", "385560", "385565", "385566", "385570", "385575",
-      "382006", "382007", "382010", "382016", "382021", "382024", "382028", "382030", "382041", "382042", 
-      "382045", "382115", "382122", "382220", "382305", "382308", "382315", "382320", "382321", "382330", 
-      "382355", "382421", "382422", "382423", "382424", "382426", "382610", "382620", "382630", "382640", 
-      "382650", "382721", "382722", "382725", "382729", "382735", "382740", "382810", "382835", "382845", 
-      "382855",
-      "384110", "384151", "384220", "384221", "384225", "384229", "384230", "384240", "384241", "384245", 
-      "384246", "384255", "384260", "384265", "384272", "384275", "384285", "384290", "385340", "385350", 
-      "385360",
-      "391120", "393025", "393040", "393041", "393050", "393120", "393130", "393140", "393145", "393150", 
-      "393151",
-      "391810", "392001", "392011", "392012", "392015", "392020", "392025", "392030", "392035", "392040", 
-      "392110", "392130", "392135", "392140", "392150", "392155", "392160", "392165", "392170", "392180", 
-      "392210", "392215", "392220", "392230", "392240", "393001", "393002", "393010", "393017", "393020", 
-      "393030", "393105", "393110", "393115", "393120", "393125", "393130", "393135", "393140", "394115", 
-      "394120", "394810",
-      "390001", "390002", "390003", "390004", "390006", "390007", "390009", "390010", "390011", "390012", 
-      "390013", "390014", "390016", "390017", "390018", "390019", "390020", "390021", "390022", "390023", 
-      "390024", "390025", "391101", "391105", "391107", "391110", "391115", "391210", "391220", "391240", 
-      "391243", "391244", "391250", "391310", "391320", "391330", "391340", "391345", "391350", "391410", 
-      "391421", "391430", "391440", "391445", "391450", "391510", "391520", "391530", "391740", "391745", 
-      "391750", "391760", "391761", "391770", "391774", "391775", "391776", "391780", "392220", "392310", 
-      "393105",
-      "387115", "387210", "387220", "387240", "387310", "387375", "387380", "387530", "387710", "388001", 
-      "388110", "388120", "388121", "388130", "388140", "388150", "388160", "388170", "388180", "388205", 
-      "388210", "388215", "388220", "388305", "388306", "388307", "388310", "388315", "388320", "388325", 
-      "388330", "388335", "388340", "388345", "388350", "388355", "388360", "388365", "388370", "388410", 
-      "388421", "388430", "388440", "388450", "388460", "388465", "388470", "388480", "388510", "388520", 
-      "388530", "388540", "388543", "388545", "388550", "388560", "388570", "388580", "388590", "388610", 
-      "388620", "388625", "388630", "388640",
-      "387001", "387002", "387003", "387110", "387115", "387120", "387130", "387210", "387230", "387305", 
-      "387315", "387320", "387325", "387330", "387335", "387340", "387345", "387350", "387355", "387360", 
-      "387365", "387370", "387375", "387380", "387411", "387430", "387510", "387520", "387530", "387540", 
-      "387550", "387560", "387570", "387610", "387620", "387630", "387635", "387640", "387650", "387710", 
-      "388180", "388215", "388220", "388225", "388230", "388235", "388239", "388245", "388250", "388255", 
-      "388440",
-      "396040", "396051", "396060", "396110", "396310", "396321", "396325", "396350", "396360", "396370", 
-      "396380", "396403", "396406", "396409", "396412", "396415", "396418", "396421", "396424", "396427", 
-      "396430", "396433", "396436", "396439", "396440", "396445", "396450", "396460", "396463", "396466", 
-      "396469", "396472", "396475", "396521", "396530", "396540", "396560", "396570", "396580", "396590",
-      "364515", "364521", "364522", "364525", "364530", "365220", "365410", "365421", "365430", "365435", 
-      "365440", "365450", "365455", "365456", "365460", "365480", "365535", "365540", "365541", "365550", 
-      "365555", "365560", "365601", "365610", "365620", "365630", "365635", "365640", "365645", "365650", 
-      "365730",
-      "364001", "364002", "364003", "364004", "364005", "364006", "364050", "364060", "364070", "364081", 
-      "364110", "364120", "364130", "364135", "364140", "364145", "364150", "364210", "364230", "364240", 
-      "364250", "364260", "364265", "364270", "364275", "364280", "364290", "364295", "364310", "364313", 
-      "364320", "364330", "364505", "364510", "364525", "364530", "364740", "364760",
-      "360001", "360002", "360003", "360004", "360005", "360006", "360007", "360020", "360021", "360022", 
-      "360023", "360024", "360025", "360026", "360028", "360030", "360035", "360040", "360045", "360050", 
-      "360055", "360060", "360070", "360110", "360311", "360320", "360325", "360330", "360360", "360370", 
-      "360375", "360380", "360405", "360410", "360421", "360430", "360440", "360450", "360452", "360460", 
-      "360465", "360470", "360480", "360485", "360490", "363440", "363520", "363650", "365480",
-      "360003", "363330", "363351", "363621", "363623", "363630", "363641", "363642", "363643", "363650", 
-      "363655", "363660", "363670",
-      "363410", "363421", "364120", "364320", "364710", "364720", "364730", "364740", "364750", "364760", 
-      "364765", "382245", "382250", "382255", "382450",
-      "383245", "383246", "383250", "383251", "383260", "383276", "383307", "383310", "383315", "383316", 
-      "383317", "383320", "383325", "383330", "383335", "383340", "383345", "383350", "383355", "383450",
-      "363001", "363002", "363020", "363030", "363035", "363040", "363110", "363115", "363310", "363320", 
-      "363330", "363410", "363421", "363423", "363427", "363430", "363435", "363440", "363510", "363520", 
-      "363530", "363745", "363750", "363755", "363760", "363765", "363775", "363780", "382130",
-      "360490", "362001", "362002", "362011", "362015", "362020", "362030", "362037", "362110", "362120", 
-      "362130", "362135", "362150", "362205", "362215", "362220", "362222", "362225", "362226", "362227", 
-      "362230", "362240", "362245", "362250", "362255", "362260", "362263", "362310", "362315", "362610", 
-      "362620", "362625", "362630", "362640", "362650", "365440",
-      "362135", "362140", "362150", "362255", "362265", "362268", "362275", "362510", "362530", "362550", 
-      "362560", "362565", "362710", "362715", "362720",
-      "360490", "360545", "360550", "360570", "360575", "360576", "360577", "360578", "360579", "360590", 
-      "362230", "362620", "362650",
-      "391110", "391125", "391130", "391135", "391140", "391145", "391150", "391152", "391156", "391160", 
-      "391165", "391168", "391170", "391761",
-      "360510", "360515", "360590", "361010", "361305", "361306", "361310", "361315", "361320", "361325", 
-      "361330", "361335", "361345", "361347", "361350",
-      "360110", "360405", "360480", "360490", "360520", "360530", "360531", "360540", "361001", "361002", 
-      "361003", "361004", "361005", "361006", "361007", "361008", "361009", "361010", "361011", "361012", 
-      "361013", "361110", "361120", "361130", "361140", "361142", "361150", "361160", "361162", "361170", 
-      "361210", "361220", "361230", "361240", "361250", "361280", "363655",
-      "394101", "394105", "394107", "394110", "394111", "394112", "394120", "394125", "394130", "394140", 
-      "394150", "394155", "394160", "394163", "394170", "394180", "394185", "394190", "394210", "394221", 
-      "394230", "394235", "394240", "394245", "394246", "394248", "394250", "394270", "394305", "394310", 
-      "394315", "394317", "394320", "394325", "394326", "394327", "394330", "394335", "394340", "394345", 
-      "394350", "394352", "394355", "394360", "394405", "394410", "394421", "394430", "394440", "394445", 
-      "394510", "394515", "394516", "394517", "394518", "394520", "394530", "394540", "394541", "394550", 
-      "394601", "394620", "394651", "395001", "395002", "395003", "395004", "395005", "395006", "395007", 
-      "395008", "395009", "395010", "395011", "395012", "395013", "395017", "395023", "396510",
-      "388710", "388713", "389001", "389002", "389110", "389115", "389120", "389210", "389220", "389310", 
-      "389320", "389330", "389340", "389341", "389350", "389360", "389365", "389370", "389380", "389390",
-      "388235", "388255", "388260", "388265", "388270", "389110", "389172", "389190", "389210", "389220", 
-      "389230", "389232", "389235", "389250", "389260", "389265",
-      "370001", "370015", "370020", "370030", "370040", "370105", "370110", "370115", "370130", "370135", 
-      "370140", "370145", "370150", "370155", "370160", "370165", "370201", "370203", "370205", "370210", 
-      "370230", "370240", "370405", "370410", "370415", "370421", "370425", "370427", "370430", "370435", 
-      "370445", "370450", "370455", "370460", "370465", "370475", "370485", "370490", "370510", "370601", 
-      "370605", "370610", "370615", "370620", "370625", "370627", "370630", "370641", "370645", "370650", 
-      "370655", "370660", "370665", "370670", "370675",
-      "396001", "396002", "396007", "396020", "396030", "396035", "396045", "396050", "396051", "396055", 
-      "396065", "396067", "396105", "396115", "396120", "396125", "396126", "396130", "396135", "396140", 
-      "396145", "396150", "396155", "396165", "396170", "396171", "396180", "396185", "396191", "396193", 
-      "396195", "396215", "396230", "396235", "396240", "396375", "396385",
-      "394246", "394250", "394340", "394360", "394365", "394370", "394375", "394380", "394620", "394630", 
-      "394633", "394635", "394640", "394641", "394650", "394651", "394652", "394655", "394660", "394670", 
-      "394680", "394690", "394716",
-      "394710", "394715", "394716", "394720", "394730",
-      "389130", "389140", "389146", "389151", "389152", "389154", "389155", "389160", "389170", "389172", 
-      "389175", "389180", "389190", "389380", "389382"
-]
-
 interface UpdateDetailsFormProps {
   onCancel: () => void
   onUpdate: () => void
@@ -600,26 +183,41 @@ const UpdateDetailsForm: React.FC<UpdateDetailsFormProps> = ({ onCancel, onUpdat
   const SearchableDropdown = ({
     name,
     label,
-    options,
+    kind,
     control,
     errors,
     placeholder = "Select an option"
   }: {
     name: keyof UpdateDetailsInput
     label: string
-    options: string[]
+    kind: GazetteerKind
     control: Control<UpdateDetailsInput>
     errors: FieldErrors<UpdateDetailsInput>
     placeholder?: string
   }) => {
     const [searchTerm, setSearchTerm] = useState("")
     const [isOpen, setIsOpen] = useState(false)
+    const [filteredOptions, setFilteredOptions] = useState<string[]>([])
     const dropdownRef = useRef<HTMLDivElement>(null)
     
-    // Filter options based on search term
-    const filteredOptions = options.filter(option => 
-      option.toLowerCase().includes(searchTerm.toLowerCase())
-    )
+    // Options come from the backend gazetteer as the user types
+    useEffect(() => {
+      if (!isOpen) return
+      let cancelled = false
+      const timer = setTimeout(() => {
+        searchGazetteer(kind, searchTerm)
+          .then((results) => {
+            if (!cancelled) setFilteredOptions(results)
+          })
+          .catch(() => {
+            if (!cancelled) setFilteredOptions([])
+          })
+      }, 150)
+      return () => {
+        cancelled = true
+        clearTimeout(timer)
+      }
+    }, [kind, searchTerm, isOpen])
     
     // Close dropdown when clicking outside
     useEffect(() => {
@@ -835,7 +433,7 @@ const UpdateDetailsForm: React.FC<UpdateDetailsFormProps> = ({ onCancel, onUpdat
               <SearchableDropdown
                 name="district"
                 label="District"
-                options={DISTRICTS}
+                kind="district"
                 control={control}
                 errors={errors}
                 placeholder="Select district"
@@ -845,7 +443,7 @@ const UpdateDetailsForm: React.FC<UpdateDetailsFormProps> = ({ onCancel, onUpdat
               <SearchableDropdown
                 name="taluka"
                 label="Taluka"
-                options={TALUKAS}
+                kind="taluka"
                 control={control}
                 errors={errors}
                 placeholder="Select taluka"
@@ -864,7 +462,7 @@ const UpdateDetailsForm: React.FC<UpdateDetailsFormProps> = ({ onCancel, onUpdat
               <SearchableDropdown
                 name="pincode"
                 label="Pincode"
-                options={PINCODES}
+                kind="pincode"
                 control={control}
                 errors={errors}
                 placeholder="Select pincode"
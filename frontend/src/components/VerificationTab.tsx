@@ -145,9 +145,6 @@ const VerificationTab = () => {
     setError(null);
 
     try {
-      // First verify the data and set the is_data_verified flag to true
-      // await verifyStudentData(student.roll_no);
-
       // Update student data in store with is_data_verified flag
       student.setStudentData({
         ...student,
@@ -425,7 +422,6 @@ export default VerificationTab;
 // import { useState, useEffect } from "react";
 // import { useNavigate } from "react-router-dom";
 // import { useStudentStore } from "../store/studentStore";
-// import { verifyStudentData } from "../services/api";
 // import {
 //   Card,
 //   CardContent,
@@ -573,7 +569,6 @@ export default VerificationTab;
 //     setError(null);
 
 //     try {
-//       await verifyStudentData(student.roll_no);
 //       student.setStudentData({ ...student, is_data_verified: true });
 //       setSuccess("Your data has been successfully verified!");
 //     } catch (err: any) {
@@ -1,6 +1,7 @@
 // src/services/api.ts
 import axios from 'axios';
 import { UpdateDetailsInput } from '../validation/schemas';
+import { StudentBootstrap, UpdateHistoryPage } from '../types/students';
 
 const API_URL =  import.meta.env.VITE_BACKEND_API_URL;
 
@@ -14,30 +15,111 @@ const api = axios.create({
   },
 });
 
+// Signed token issued by login, lets the backend identify the student
+// without checking the password again
+api.interceptors.request.use((config) => {
+  const token = localStorage.getItem('studentToken');
+  if (token) {
+    config.headers.Authorization = `Token ${token}`;
+  }
+  return config;
+});
+
+// Latest ETag seen for each student, sent back as If-Match on updates so the
+// backend can reject edits made against stale data
+const studentVersions: Record<string, string> = {};
+
+const rememberVersion = (roll_no: string, headers: Record<string, any>) => {
+  if (headers?.etag) {
+    studentVersions[roll_no] = headers.etag;
+  }
+};
+
 export const loginStudent = async (roll_no: string, password: string) => {
   console.log("Roll no:", roll_no, "Password:",password)
   const response = await api.post('/login/', { roll_no, password });
   console.log("backend response:", response);
+  rememberVersion(roll_no, response.headers);
+
+  const { token, ...student } = response.data;
+  localStorage.setItem('studentToken', token);
   
-  return response.data;
+  return student;
+};
+
+// Newest history page delivered by bootstrap, handed to the first
+// getUpdateHistory call instead of requesting it again
+const bootstrappedHistory: Record<string, UpdateHistoryPage> = {};
+
+// Profile, verification status and newest history page in one request.
+// With credentials this logs in, without it reloads for the stored token.
+export const bootstrapStudent = async (roll_no?: string, password?: string): Promise<StudentBootstrap> => {
+  const response = password === undefined
+    ? await api.get('/bootstrap/')
+    : await api.post('/bootstrap/', { roll_no, password });
+  const data: StudentBootstrap = response.data;
+  rememberVersion(data.student.roll_no, response.headers);
+  if (data.token) {
+    localStorage.setItem('studentToken', data.token);
+  }
+  bootstrappedHistory[data.student.roll_no] = data.history;
+  return data;
 };
 
 export const getStudentData = async (roll_no: string) => {
   const response = await api.get(`/students/${roll_no}/`);
+  rememberVersion(roll_no, response.headers);
   return response.data;
 };
 
 export const updateStudentData = async (roll_no: string, data: UpdateDetailsInput) => {
-  const response = await api.patch(`/students/${roll_no}/`, data);
+  if (!studentVersions[roll_no]) {
+    await getStudentData(roll_no);
+  }
+  const response = await api.patch(`/students/${roll_no}/`, data, {
+    headers: { 'If-Match': studentVersions[roll_no] },
+  });
+  rememberVersion(roll_no, response.headers);
+  return response.data;
+};
+
+// Texts a one-time code to the student's mobile number
+export const sendOtp = async (roll_no: string) => {
+  const response = await api.post(`/students/${roll_no}/send_otp/`);
   return response.data;
 };
 
-export const verifyStudentData = async (roll_no: string) => {
-  const response = await api.post(`/students/${roll_no}/verify/`);
+// Marks the mobile number verified if the code matches the last one sent
+export const verifyOtp = async (roll_no: string, otp: string) => {
+  const response = await api.post(`/students/${roll_no}/verify_otp/`, { otp });
   return response.data;
 };
 
-export const getUpdateHistory = async (roll_no: string) => {
-  const response = await api.get(`/students/${roll_no}/history/`);
+// Without options this is the newest page. `since` returns only entries
+// newer than that update_date (oldest first), `cursor` follows a `next` link
+// and `archived` returns the entries moved out by the retention policy.
+export const getUpdateHistory = async (
+  roll_no: string,
+  options: { since?: string; cursor?: string; archived?: boolean } = {}
+): Promise<UpdateHistoryPage> => {
+  if (options.cursor) {
+    return (await api.get(options.cursor)).data;
+  }
+  if (!options.since && !options.archived && bootstrappedHistory[roll_no]) {
+    const page = bootstrappedHistory[roll_no];
+    delete bootstrappedHistory[roll_no];
+    return page;
+  }
+  const params: Record<string, string> = {};
+  if (options.since) params.since = options.since;
+  if (options.archived) params.archived = 'true';
+  const response = await api.get(`/students/${roll_no}/history/`, { params });
   return response.data;
-};
\ No newline at end of file
+};
+
+export type GazetteerKind = 'district' | 'taluka' | 'city' | 'pincode';
+
+export const searchGazetteer = async (kind: GazetteerKind, q: string, limit = 50): Promise<string[]> => {
+  const response = await api.get('/gazetteer/autocomplete/', { params: { kind, q, limit } });
+  return response.data.results;
+};
@@ -83,6 +83,7 @@ export const useStudentStore = create<StudentStore>((set) => {
     logout: () => {
       localStorage.removeItem('studentSession');
       localStorage.removeItem('lastActivity');
+      localStorage.removeItem('studentToken');
       set({
         id: '',
         roll_no: '',
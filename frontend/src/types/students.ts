@@ -17,23 +17,30 @@ export interface Student {
   is_mobile_verified: boolean;
 }
 
+// One save; maps each changed field to [old_value, new_value]
 export interface UpdateHistory {
   id: string;
   student_id: string;
   update_date: string;
-  field_name: string;
-  old_value: string;
-  new_value: string;
+  changes: Record<string, [string | null, string | null]>;
 }
 
+export interface UpdateHistoryPage {
+  next: string | null;
+  previous: string | null;
+  results: UpdateHistory[];
+}
 
-export interface UpdateHistory {
-  id: string;
-  student_id: string;
-  update_date: string;
-  field_name: string;
-  old_value: string;
-  new_value: string;
+// Everything the dashboard needs on load, from /bootstrap/
+export interface StudentBootstrap {
+  student: Student;
+  verification: {
+    is_data_verified: boolean;
+    is_mobile_verified: boolean;
+    complete: boolean;
+  };
+  history: UpdateHistoryPage;
+  token?: string;
 }
 
 